@@ -0,0 +1,152 @@
+# analyzer.py
+import time
+
+from angles import compute_angles
+from exercises import EXERCISES, FrameClock, Readout
+from filters import resolve_smoothing
+
+MODES = tuple(EXERCISES)  # "Push-Up", "Curl", "Squat", "Plank"
+
+PUSHUP_ELBOW_MIN = 70
+PUSHUP_ELBOW_MAX = 160
+CURL_ELBOW_MIN = 50
+CURL_ELBOW_MAX = 160
+SQUAT_KNEE_MIN = 80  # Minimum knee angle for squat down
+SQUAT_KNEE_MAX = 160  # Maximum knee angle for squat up
+PLANK_ALIGNMENT_THRESHOLD = 0.15  # Threshold for body alignment
+
+# Tunable thresholds; override per analyzer with WorkoutAnalyzer(thresholds={...})
+DEFAULT_THRESHOLDS = {
+    "pushup_elbow_min": PUSHUP_ELBOW_MIN,
+    "pushup_elbow_max": PUSHUP_ELBOW_MAX,
+    "curl_elbow_min": CURL_ELBOW_MIN,
+    "curl_elbow_max": CURL_ELBOW_MAX,
+    "squat_knee_min": SQUAT_KNEE_MIN,
+    "squat_knee_max": SQUAT_KNEE_MAX,
+    "plank_alignment_threshold": PLANK_ALIGNMENT_THRESHOLD,
+}
+
+# Counters stored with every workout session
+COUNTER_FIELDS = (
+    "pushup_count", "curl_count_r", "curl_count_l", "squat_count", "plank_time",
+    "pushup_good_posture", "pushup_bad_posture",
+    "curl_r_good_posture", "curl_r_bad_posture",
+    "curl_l_good_posture", "curl_l_bad_posture",
+    "squat_good_posture", "squat_bad_posture",
+    "plank_good_posture_time", "plank_bad_posture_time",
+)
+
+
+class SessionCounters:
+    """Rep counts and posture scores for one session; replaced as a whole on reset"""
+
+    __slots__ = COUNTER_FIELDS + ("plank_start_time",)
+
+    def __init__(self):
+        for name in COUNTER_FIELDS:
+            setattr(self, name, 0)
+        self.plank_start_time = None
+
+
+class WorkoutAnalyzer:
+    """Rep counting and posture scoring for one person, independent of the video source.
+
+    Holds one instance of every registered exercise (see exercises.py); each
+    frame is dispatched to the exercise for the current mode. smoothing picks
+    the angle filter per joint (a spec string or {joint: spec}, see filters.py).
+    """
+
+    def __init__(self, thresholds=None, smoothing=None):
+        thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        unknown = set(thresholds) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown thresholds: {', '.join(sorted(unknown))}")
+        self.thresholds = thresholds
+        self.smoothing = resolve_smoothing(smoothing)
+        self.readout = Readout()  # Current angles for display
+        self.clock = FrameClock()  # Frame timing shared by every exercise
+        self.rep_events = []  # RepEvents of completed reps; the owner persists and clears them
+        # Stages and smoothing live in the exercises and carry over between sessions
+        self.exercises = {mode: cls(thresholds, self.readout, self.smoothing, self.rep_events)
+                          for mode, cls in EXERCISES.items()}
+        self.session = SessionCounters()
+
+    def reset_counters(self):
+        """Start a fresh set of session counters; returns the previous set"""
+        previous, self.session = self.session, SessionCounters()
+        return previous
+
+    def counters(self):
+        """Session counters as a plain dict"""
+        session = self.session
+        data = {name: getattr(session, name) for name in COUNTER_FIELDS}
+        data["plank_good_posture_time"] = int(session.plank_good_posture_time)
+        data["plank_bad_posture_time"] = int(session.plank_bad_posture_time)
+        return data
+
+    def total_reps(self, mode):
+        exercise = self.exercises.get(mode)
+        return exercise.total_reps(self.session) if exercise is not None else 0
+
+    # ------------------ Display ------------------
+    @property
+    def pushup_stage(self):
+        return self.exercises["Push-Up"].stage
+
+    @property
+    def curl_stage_r(self):
+        return self.exercises["Curl"].stage_r
+
+    @property
+    def curl_stage_l(self):
+        return self.exercises["Curl"].stage_l
+
+    @property
+    def squat_stage(self):
+        return self.exercises["Squat"].stage
+
+    @property
+    def current_elbow_angle(self):
+        return self.readout.elbow  # Push-Up average, or Plank alignment metric
+
+    @property
+    def current_elbow_angle_r(self):
+        return self.readout.elbow_r
+
+    @property
+    def current_elbow_angle_l(self):
+        return self.readout.elbow_l
+
+    @property
+    def current_knee_angle(self):
+        return self.readout.knee
+
+    @property
+    def rep_seconds(self):
+        return self.readout.rep_seconds
+
+    # ------------------ Frames ------------------
+    def update(self, pts, mode, now=None):
+        """Advance the state machine for `mode` with one frame of (33, 3) landmarks.
+
+        now is the frame's monotonic timestamp in seconds (defaults to the
+        current time); durations are measured between these timestamps.
+        Returns the feedback string for the frame.
+        """
+        return self.step(compute_angles(pts).tolist(), pts[:, 0].tolist(),
+                         pts[:, 1].tolist(), mode, now)
+
+    def step(self, angles, xs, ys, mode, now=None):
+        """Dispatch one frame of precomputed joint angles and landmark x/y lists.
+
+        Live frames arrive through update(); replay.py calls this directly with
+        angles computed for a whole recording in one vectorized pass.
+        """
+        self.clock.tick(time.monotonic() if now is None else now)
+        exercise = self.exercises.get(mode)
+        if exercise is None:
+            return ""
+        landmarks = exercise.landmarks
+        return exercise.step([angles[i] for i in exercise.joint_index],
+                             [xs[i] for i in landmarks], [ys[i] for i in landmarks],
+                             self.session, self.clock)
@@ -0,0 +1,110 @@
+# angles.py
+import numpy as np
+
+# ------------------ Landmark Indices ------------------
+# Same numbering as mp_pose.PoseLandmark, kept here so the engine works without MediaPipe
+NUM_LANDMARKS = 33
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+MID_HIP = NUM_LANDMARKS  # Virtual point appended after the real landmarks
+
+# ------------------ Joint Triples ------------------
+# (name, (a, b, c)) -> angle measured at b
+JOINTS = (
+    ("r_elbow", (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST)),
+    ("l_elbow", (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST)),
+    ("r_knee", (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE)),
+    ("l_knee", (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE)),
+    ("r_hip", (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE)),
+    ("l_hip", (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE)),
+    ("spine", (RIGHT_SHOULDER, MID_HIP, LEFT_SHOULDER)),
+)
+JOINT_NAMES = tuple(name for name, _ in JOINTS)
+JOINT_INDEX = {name: i for i, name in enumerate(JOINT_NAMES)}
+
+_A, _B, _C = (np.array(idx) for idx in zip(*(triple for _, triple in JOINTS)))
+
+# ------------------ Wire Layouts ------------------
+# A serialized NormalizedLandmarkList is one length-prefixed record per landmark
+# (tag 0x0a, length byte) holding fixed32 fields x, y, z, visibility[, presence],
+# each a tag byte followed by a little-endian float32.
+_FIELD_TAGS = bytes((number << 3) | 5 for number in range(1, 6))
+
+
+def _wire_layout(n_fields):
+    """(record size, ((offset, expected bytes at that offset in every record), ...))"""
+    checks = [(0, b"\x0a"), (1, bytes((5 * n_fields,)))]
+    checks += [(2 + 5 * i, _FIELD_TAGS[i:i + 1]) for i in range(n_fields)]
+    return 2 + 5 * n_fields, tuple((offset, byte * NUM_LANDMARKS) for offset, byte in checks)
+
+
+# Total serialized size -> layout, for landmarks with and without the presence field
+_WIRE_LAYOUTS = {size * NUM_LANDMARKS: (size, checks) for size, checks in map(_wire_layout, (4, 5))}
+
+
+# ------------------ Conversion ------------------
+def landmarks_to_array(landmarks, visibility=False):
+    """Copy MediaPipe landmarks into a (33, 3) float32 array of x, y, z.
+
+    With visibility, a fourth channel holds each landmark's visibility score.
+    """
+    if visibility:
+        return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks], dtype=np.float32)
+    return np.array([(lm.x, lm.y, lm.z) for lm in landmarks], dtype=np.float32)
+
+
+class LandmarkBuffer:
+    """Preallocated (33, 4) float32 x, y, z, visibility array, refilled in place every frame.
+
+    When the landmark list serializes to the usual packed layout, fill() copies
+    the floats straight out of the wire bytes with one strided view instead of
+    132 protobuf attribute reads; any other layout takes the attribute path.
+    The same array is returned every frame, so callers copy whatever they keep.
+    """
+
+    def __init__(self):
+        self.points = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+        self._flat = self.points.reshape(-1)
+
+    def fill(self, landmark_list):
+        """Copy a NormalizedLandmarkList (results.pose_landmarks) into the buffer"""
+        raw = landmark_list.SerializeToString()
+        layout = _WIRE_LAYOUTS.get(len(raw))
+        if layout is not None:
+            size, checks = layout
+            if all(raw[offset::size] == expected for offset, expected in checks):
+                self.points[:] = np.ndarray((NUM_LANDMARKS, 4), "<f4", raw, 3, (size, 5))
+                return self.points
+        self._flat[:] = [v for lm in landmark_list.landmark for v in (lm.x, lm.y, lm.z, lm.visibility)]
+        return self.points
+
+
+# ------------------ Angle Engine ------------------
+def compute_angles(points):
+    """Angles (degrees, 0-180) for every joint in JOINTS.
+
+    points is (33, C) for one frame or (T, 33, C) for a clip, with x and y in
+    the first two channels. Returns (n_joints,) or (T, n_joints) respectively.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    xy = points[..., :2]
+    mid_hip = (xy[..., RIGHT_HIP, :] + xy[..., LEFT_HIP, :]) / 2
+    xy = np.concatenate([xy, mid_hip[..., None, :]], axis=-2)
+
+    a = xy[..., _A, :]
+    b = xy[..., _B, :]
+    c = xy[..., _C, :]
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    angle = np.abs(np.degrees(radians))
+    return np.where(angle > 180.0, 360.0 - angle, angle)
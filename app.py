@@ -1,605 +1,649 @@
 # app.py
-from flask import Flask, Response, jsonify, request
+from flask import Flask, Response, abort, g, jsonify, request
 from flask_cors import CORS
-import cv2
-import mediapipe as mp
-import math
 from datetime import datetime
+import atexit
 import json
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+import zlib
+from metrics import Metrics
+from pipeline import InferenceScheduler
+from session_store import SessionStore
+from filters import parse_smoothing
+from station import Station, parse_source
 
 app = Flask(__name__)
 CORS(app)  # Allow cross-origin requests
+app.url_map.redirect_defaults = False  # Serve /stations/0/... directly instead of redirecting to the legacy path
+
+# ------------------ Inference Settings ------------------
+TARGET_FPS = float(os.environ.get("TARGET_FPS", 15))
+MODEL_COMPLEXITY = int(os.environ.get("MODEL_COMPLEXITY", 2))  # Highest complexity the governor may pick
+ADAPTIVE_INFERENCE = os.environ.get("ADAPTIVE_INFERENCE", "1") == "1"
+
+# ROI mode: infer on a downscaled crop around the person instead of the full frame
+ROI_TRACKING = os.environ.get("ROI_TRACKING") == "1"
+
+# MJPEG stream defaults; clients may ask for ?quality=..&width=.. per connection
+JPEG_QUALITY = int(os.environ.get("JPEG_QUALITY", 80))
+JPEG_ENCODER = os.environ.get("JPEG_ENCODER", "auto")  # auto (TurboJPEG if installed), turbojpeg or opencv
+
+# Angle filter for every joint ("one_euro") or per joint ("default=mean:8,r_knee=one_euro:1.0:0.05")
+SMOOTHING = parse_smoothing(os.environ.get("SMOOTHING"))
+
+# Group classes: track up to MAX_PEOPLE people per station, each with their own counters
+MULTI_PERSON = os.environ.get("MULTI_PERSON") == "1"
+MAX_PEOPLE = int(os.environ.get("MAX_PEOPLE", 4))
+DETECT_EVERY = int(os.environ.get("DETECT_EVERY", 15))  # Frames between searches for new people
+
+# ------------------ Stations ------------------
+# Comma-separated capture sources, one station each: camera indexes, video files or stream URLs
+STATION_SOURCES = [s for s in os.environ.get("STATION_SOURCES", "0").split(",") if s.strip()]
+# Video file sources play at their own frame rate; at the end they restart, or with LOOP_VIDEO=0 the station stops
+LOOP_VIDEO = os.environ.get("LOOP_VIDEO", "1") == "1"
+# Inference workers shared by all stations (defaults to one per core)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 0)) or None
+
+# Landmark recording (opt-in per session, or for every session with RECORD_LANDMARKS=1)
+RECORDINGS_DIR = os.environ.get("RECORDINGS_DIR", "recordings")
+RECORD_LANDMARKS = os.environ.get("RECORD_LANDMARKS") == "1"
+
+# ------------------ Serving ------------------
+# waitress (production, thread pool) or dev (Flask's debug server, without the reloader)
+SERVER = os.environ.get("SERVER", "waitress")
+HOST = os.environ.get("HOST", "127.0.0.1")
+PORT = int(os.environ.get("PORT", 5000))
+# Every open /video_feed, /landmark_stream or /pose_stream holds one thread for its lifetime;
+# size this for the expected streams plus headroom for /pose_data and /get_summary polls
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 32))
+
+# Load the pose models in the background at launch; cameras still open on the first stream
+WARMUP = os.environ.get("WARMUP", "1") == "1"
+
+# Stage/endpoint latency histograms on /metrics; METRICS=0 removes all instrumentation
+METRICS = os.environ.get("METRICS", "1") == "1"
+metrics = Metrics() if METRICS else None
 
-# ------------------ Angle Calculation ------------------
-def calculate_angle(a, b, c):
-    a = [a.x, a.y]
-    b = [b.x, b.y]
-    c = [c.x, c.y]
-    radians = math.atan2(c[1]-b[1], c[0]-b[0]) - math.atan2(a[1]-b[1], a[0]-b[0])
-    angle = abs(radians*180.0/math.pi)
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
-
-# ------------------ Helper Class ------------------
-class Point:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-
-# ------------------ Mediapipe Setup ------------------
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(static_image_mode=False,
-                    model_complexity=2,
-                    enable_segmentation=False,
-                    min_detection_confidence=0.5,
-                    min_tracking_confidence=0.5)
-mp_draw = mp.solutions.drawing_utils
-
-# ------------------ Camera ------------------
-cap = cv2.VideoCapture(0)  # Default laptop camera
-if not cap.isOpened():
-    raise RuntimeError("Cannot open default camera")
+# Workout session tracking
+SESSIONS_DB = os.environ.get("SESSIONS_DB", "workout_sessions.db")
+session_store = SessionStore(SESSIONS_DB)  # Persistent history of saved sessions and rep events
+# Log every push-up, curl and squat rep (timing, angles, posture) for /get_reps and /get_rep_stats
+REP_EVENTS = os.environ.get("REP_EVENTS", "1") == "1"
+
+# A single station keeps its own inference thread; several share one worker pool
+inference_scheduler = InferenceScheduler(INFERENCE_WORKERS) if len(STATION_SOURCES) > 1 else None
+stations = {}
+for index, source in enumerate(STATION_SOURCES):
+    station_id = str(index)
+    stations[station_id] = Station(station_id, parse_source(source), inference_scheduler,
+                                   TARGET_FPS, MODEL_COMPLEXITY, ADAPTIVE_INFERENCE,
+                                   ROI_TRACKING, RECORDINGS_DIR, SMOOTHING, JPEG_QUALITY, JPEG_ENCODER,
+                                   metrics, MULTI_PERSON, MAX_PEOPLE, DETECT_EVERY, INFERENCE_WORKERS,
+                                   session_store.add_reps if REP_EVENTS else None, LOOP_VIDEO)
+DEFAULT_STATION = "0"  # Backs the un-prefixed legacy routes
+default_station = stations[DEFAULT_STATION]
 
 # ------------------ State Variables ------------------
-pushup_count = 0
-pushup_stage = None
-curl_count_r = 0
-curl_count_l = 0
-curl_stage_r = None
-curl_stage_l = None
-squat_count = 0
-squat_stage = None
-plank_time = 0  # Time in seconds
-plank_start_time = None
-
-# Posture quality tracking
-pushup_good_posture = 0
-pushup_bad_posture = 0
-curl_r_good_posture = 0
-curl_r_bad_posture = 0
-curl_l_good_posture = 0
-curl_l_bad_posture = 0
-squat_good_posture = 0
-squat_bad_posture = 0
-plank_good_posture_time = 0  # Time in good posture (seconds)
-plank_bad_posture_time = 0  # Time in bad posture (seconds)
-
-PUSHUP_ELBOW_MIN = 70
-PUSHUP_ELBOW_MAX = 160
-CURL_ELBOW_MIN = 50
-CURL_ELBOW_MAX = 160
-SQUAT_KNEE_MIN = 80  # Minimum knee angle for squat down
-SQUAT_KNEE_MAX = 160  # Maximum knee angle for squat up
-PLANK_ALIGNMENT_THRESHOLD = 0.15  # Threshold for body alignment
-ANGLE_HISTORY_WINDOW = 8
-angle_history = []
-angle_history_r = []
-angle_history_l = []
-knee_angle_history = []
-
-mode = "Push-Up"  # Default mode
-
-# Current angles for display
-current_elbow_angle = 0  # For Push-Up mode (average)
-current_elbow_angle_r = 0  # For Curl mode (right)
-current_elbow_angle_l = 0  # For Curl mode (left)
-current_knee_angle = 0  # For Squat mode (average)
-
-# Workout session tracking
-workout_sessions = []  # Store all workout sessions
-current_session_start = None
-current_session_mode = None
+SESSIONS_PAGE_LIMIT = 100  # Default /get_sessions page size
+SESSIONS_PAGE_MAX = 1000
+SUMMARY_ETAG_PREFIX = uuid.uuid4().hex[:8]  # Keeps ETags from a previous process from matching
+summary_cache = {}  # filters -> (etag, JSON body) of the last /get_summary response
+
+def get_station(station_id):
+    station = stations.get(station_id)
+    if station is None:
+        abort(404, description=f"Unknown station {station_id!r}")
+    return station
+
+def start_station(station):
+    """Open the station's camera and start its pipeline if needed; 503 if the camera is unavailable"""
+    try:
+        station.start()
+    except RuntimeError as exc:
+        abort(503, description=str(exc))
+
+# ------------------ Metrics ------------------
+if metrics is not None:
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop("request_started", None)
+        if started is not None and request.endpoint:
+            metrics.request_seconds.labels(request.endpoint).observe(time.perf_counter() - started)
+        return response
+
+def pipeline_metric_families():
+    """Counters and gauges read from every station's pipeline stats at scrape time"""
+    frames, dropped, failures, errors, depth = [], [], [], [], []
+    inferred, detected, detection_rate, streams = [], [], [], []
+    people, person_inferences, detection_passes = [], [], []
+    for station in stations.values():
+        label = {"station": station.id}
+        stats = station.pipeline.stats()
+        # Multi-person stations bypass the governor; the tracker counts the same way
+        inference = station.person_tracker or station.governor
+        published = station.pipeline.frames_published()
+        video_viewers = sum(output.subscriber_count() for profile, output in tuple(station.pipeline.outputs.items())
+                            if profile.kind == "mjpeg")
+        frames += [(dict(label, stage="capture"), stats["capture"]["frames"]),
+                   (dict(label, stage="inference"), stats["inference"]["frames"]),
+                   (dict(label, stage="encode"), published)]
+        dropped += [(dict(label, stage="capture"), stats["capture"]["dropped"]),
+                    (dict(label, stage="inference"), stats["inference"]["dropped"])]
+        failures.append((label, stats["capture"]["failures"]))
+        errors += [(dict(label, stage=stage), stats[stage]["errors"]) for stage in ("capture", "inference", "encode")]
+        depth += [(dict(label, queue="capture"), stats["capture"]["queue_depth"]),
+                  (dict(label, queue="encode"), stats["inference"]["queue_depth"])]
+        inferred.append((label, inference.frames_inferred))
+        detected.append((label, inference.frames_detected))
+        if inference.frames_inferred:
+            detection_rate.append((label, inference.frames_detected / inference.frames_inferred))
+        tracker = station.person_tracker
+        if tracker is not None:
+            people.append((label, len(tracker.tracks)))
+            person_inferences.append((label, tracker.person_inferences))
+            detection_passes.append((label, tracker.detections))
+        streams += [(dict(label, stream="video_feed"), video_viewers),
+                    (dict(label, stream="landmark_stream"), station.landmark_updates.subscriber_count()),
+                    (dict(label, stream="pose_stream"), station.pose_updates.subscriber_count())]
+    return (
+        ("pose_frames_total", "counter", "Frames leaving each pipeline stage.", frames),
+        ("pose_frames_dropped_total", "counter", "Frames dropped from a stage's output queue.", dropped),
+        ("pose_capture_failures_total", "counter", "Failed or empty camera reads.", failures),
+        ("pose_stage_errors_total", "counter", "Frames lost to an exception in a pipeline stage.", errors),
+        ("pose_queue_depth", "gauge", "Frames waiting in each pipeline queue.", depth),
+        ("pose_inferred_frames_total", "counter", "Frames that went through pose inference.", inferred),
+        ("pose_detected_frames_total", "counter", "Inferred frames in which a person was detected.", detected),
+        ("pose_landmark_detection_ratio", "gauge", "Share of inferred frames with a detected person.",
+         detection_rate),
+        ("pose_active_streams", "gauge", "Connected streaming clients.", streams),
+        ("pose_tracked_people", "gauge", "People currently tracked (multi-person stations).", people),
+        ("pose_person_inferences_total", "counter", "Per-person pose inferences (multi-person stations).",
+         person_inferences),
+        ("pose_detection_passes_total", "counter", "Completed people-detection passes (multi-person stations).",
+         detection_passes),
+    )
 
 # ------------------ Video Generator ------------------
-def gen_frames():
-    global pushup_count, pushup_stage
-    global curl_count_r, curl_count_l, curl_stage_r, curl_stage_l
-    global angle_history, angle_history_r, angle_history_l
-    global current_elbow_angle, current_elbow_angle_r, current_elbow_angle_l
-    global pushup_good_posture, pushup_bad_posture
-    global curl_r_good_posture, curl_r_bad_posture, curl_l_good_posture, curl_l_bad_posture
-
-    while True:
-        success, img = cap.read()
-        # Skip bad frames so MediaPipe doesn't receive empty packets
-        if not success or img is None or img.size == 0:
-            continue
-
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        results = pose.process(imgRGB)
-
-        feedback_r = ""
-        feedback_l = ""
-        feedback = ""
-
-        if results.pose_landmarks:
-            landmarks = results.pose_landmarks.landmark
-            # --- Common joints ---
-            r_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-            r_elbow = landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-            r_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value]
-
-            l_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-            l_elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-            l_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-
-            r_angle = calculate_angle(r_shoulder, r_elbow, r_wrist)
-            l_angle = calculate_angle(l_shoulder, l_elbow, l_wrist)
-
-            if mode == "Push-Up":
-                r_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-                l_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-                mid_hip = Point((r_hip.x + l_hip.x)/2, (r_hip.y + l_hip.y)/2)
-                spine_angle = calculate_angle(r_shoulder, mid_hip, l_shoulder)
-
-                elbow_angle = (r_angle + l_angle) / 2
-                angle_history.append(elbow_angle)
-                if len(angle_history) > ANGLE_HISTORY_WINDOW:
-                    angle_history.pop(0)
-                smoothed_angle = sum(angle_history)/len(angle_history)
-                current_elbow_angle = int(smoothed_angle)
-
-                if smoothed_angle <= PUSHUP_ELBOW_MIN and spine_angle > 150:
-                    pushup_stage = "down"
-                    feedback = "Go down further"
-                elif smoothed_angle >= PUSHUP_ELBOW_MAX and pushup_stage == "down" and spine_angle > 150:
-                    pushup_stage = "up"
-                    pushup_count += 1
-                    # Track posture quality: good if spine is straight (spine_angle > 150)
-                    if spine_angle > 150:
-                        pushup_good_posture += 1
-                    else:
-                        pushup_bad_posture += 1
-                    feedback = "Push up!"
-                else:
-                    feedback = "Good posture"
-
-            elif mode == "Curl":
-                torso_x = (l_shoulder.x + r_shoulder.x)/2
-
-                angle_history_r.append(r_angle)
-                if len(angle_history_r) > ANGLE_HISTORY_WINDOW:
-                    angle_history_r.pop(0)
-                smoothed_r = sum(angle_history_r)/len(angle_history_r)
-                current_elbow_angle_r = int(smoothed_r)
-
-                angle_history_l.append(l_angle)
-                if len(angle_history_l) > ANGLE_HISTORY_WINDOW:
-                    angle_history_l.pop(0)
-                smoothed_l = sum(angle_history_l)/len(angle_history_l)
-                current_elbow_angle_l = int(smoothed_l)
-
-                if smoothed_r <= CURL_ELBOW_MIN and abs(r_elbow.x - torso_x) < 0.1:
-                    curl_stage_r = "up"
-                    feedback_r = "Curl up!"
-                elif smoothed_r >= CURL_ELBOW_MAX and curl_stage_r == "up":
-                    curl_stage_r = "down"
-                    curl_count_r += 1
-                    # Track posture quality: good if elbow stays close to torso
-                    if abs(r_elbow.x - torso_x) < 0.1:
-                        curl_r_good_posture += 1
-                    else:
-                        curl_r_bad_posture += 1
-                    feedback_r = "Lower slowly"
-                else:
-                    feedback_r = "Good posture"
-
-                if smoothed_l <= CURL_ELBOW_MIN and abs(l_elbow.x - torso_x) < 0.1:
-                    curl_stage_l = "up"
-                    feedback_l = "Curl up!"
-                elif smoothed_l >= CURL_ELBOW_MAX and curl_stage_l == "up":
-                    curl_stage_l = "down"
-                    curl_count_l += 1
-                    # Track posture quality: good if elbow stays close to torso
-                    if abs(l_elbow.x - torso_x) < 0.1:
-                        curl_l_good_posture += 1
-                    else:
-                        curl_l_bad_posture += 1
-                    feedback_l = "Lower slowly"
-                else:
-                    feedback_l = "Good posture"
-
-            elif mode == "Squat":
-                # Get hip, knee, and ankle landmarks
-                r_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-                r_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value]
-                r_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-                
-                l_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-                l_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value]
-                l_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-                
-                # Calculate knee angles
-                r_knee_angle = calculate_angle(r_hip, r_knee, r_ankle)
-                l_knee_angle = calculate_angle(l_hip, l_knee, l_ankle)
-                knee_angle = (r_knee_angle + l_knee_angle) / 2
-                
-                # Smooth knee angle
-                knee_angle_history.append(knee_angle)
-                if len(knee_angle_history) > ANGLE_HISTORY_WINDOW:
-                    knee_angle_history.pop(0)
-                smoothed_knee_angle = sum(knee_angle_history) / len(knee_angle_history)
-                current_knee_angle = int(smoothed_knee_angle)
-                
-                # Check spine alignment for posture
-                mid_hip = Point((r_hip.x + l_hip.x)/2, (r_hip.y + l_hip.y)/2)
-                spine_angle = calculate_angle(r_shoulder, mid_hip, l_shoulder)
-                
-                # Squat detection
-                if smoothed_knee_angle <= SQUAT_KNEE_MIN:
-                    squat_stage = "down"
-                    feedback = "Go lower"
-                elif smoothed_knee_angle >= SQUAT_KNEE_MAX and squat_stage == "down":
-                    squat_stage = "up"
-                    squat_count += 1
-                    # Track posture quality: good if spine is relatively straight
-                    if spine_angle > 140:
-                        squat_good_posture += 1
-                    else:
-                        squat_bad_posture += 1
-                    feedback = "Stand up!"
-                else:
-                    feedback = "Good posture"
-
-            elif mode == "Plank":
-                # Get key points for plank alignment
-                r_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-                l_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-                r_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-                l_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-                r_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-                l_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-                
-                # Calculate alignment - check if shoulders, hips, and ankles are aligned
-                shoulder_y = (r_shoulder.y + l_shoulder.y) / 2
-                hip_y = (r_hip.y + l_hip.y) / 2
-                ankle_y = (r_ankle.y + l_ankle.y) / 2
-                
-                # Calculate deviation from straight line
-                alignment_deviation = abs(shoulder_y - hip_y) + abs(hip_y - ankle_y)
-                
-                # Start tracking time if not started
-                if plank_start_time is None:
-                    import time
-                    plank_start_time = time.time()
-                
-                # Update plank time
-                import time
-                current_time = time.time()
-                elapsed = current_time - plank_start_time
-                
-                # Track posture quality based on alignment
-                if alignment_deviation < PLANK_ALIGNMENT_THRESHOLD:
-                    plank_good_posture_time += 0.5  # Add 0.5 seconds per frame (assuming ~2 FPS processing)
-                    feedback = "Perfect plank!"
-                else:
-                    plank_bad_posture_time += 0.5
-                    feedback = "Keep body straight"
-                
-                plank_time = int(elapsed)
-                current_elbow_angle = int(alignment_deviation * 1000)  # Use as display metric
-
-            # Draw skeleton
-            mp_draw.draw_landmarks(img, results.pose_landmarks, mp_pose.POSE_CONNECTIONS)
-
-        # Encode frame as JPEG
-        ret, buffer = cv2.imencode('.jpg', img)
-        frame = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+def gen_frames(station, profile):
+    """Stream a station's latest frames in one encode profile to one HTTP client"""
+    with station.pipeline.subscribe(profile) as subscriber:
+        while True:
+            part = subscriber.get(timeout=1.0)
+            if part is None:
+                continue
+            yield part  # Already a complete multipart chunk, shared with every client of this profile
 
 # ------------------ Flask Routes ------------------
-@app.route('/video_feed')
-def video_feed():
-    return Response(gen_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
-
-@app.route('/pose_data')
-def pose_data():
-    # Determine which angle to send based on mode
-    if mode == "Push-Up":
-        angle = current_elbow_angle
-    elif mode == "Curl":
-        # For curl, use average of both arms
-        angle = int((current_elbow_angle_r + current_elbow_angle_l) / 2)
-    elif mode == "Squat":
-        angle = current_knee_angle
-    elif mode == "Plank":
-        angle = current_elbow_angle  # Using alignment deviation
+# Per-station routes live under /stations/<id>/...; the original paths serve the default station.
+@app.route('/stations')
+def list_stations():
+    return jsonify({"stations": [station.status() for station in stations.values()],
+                    "inference": inference_scheduler.stats() if inference_scheduler else None})
+
+@app.route('/video_feed', defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/video_feed')
+def video_feed(station_id):
+    """MJPEG stream; optional ?quality=10-100 and ?width=<pixels> pick the encode profile"""
+    station = get_station(station_id)
+    start_station(station)
+    profile = station.profile(request.args.get("quality", type=int), request.args.get("width", type=int))
+    return Response(gen_frames(station, profile), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+def gen_landmarks(station, thumbnails):
+    """Stream packed landmark messages (plus thumbnail messages, if requested) to one client"""
+    thumbnail_subscriber = station.pipeline.subscribe(thumbnails) if thumbnails else None
+    try:
+        with station.landmark_updates.subscribe() as subscriber:
+            while True:
+                message = subscriber.get(timeout=1.0)
+                if thumbnail_subscriber is not None:
+                    thumbnail = thumbnail_subscriber.get(timeout=0)
+                    if thumbnail is not None:
+                        yield thumbnail
+                if message is not None:
+                    yield message
+    finally:
+        if thumbnail_subscriber is not None:
+            thumbnail_subscriber.close()
+
+@app.route('/landmark_stream', defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/landmark_stream')
+def landmark_stream(station_id):
+    """Binary landmark stream for client-side skeleton rendering (message format in encoder.py).
+
+    ?thumbnail=1 adds a low-rate raw frame; thumbnail_interval (s) and
+    thumbnail_width tune it.
+    """
+    station = get_station(station_id)
+    start_station(station)
+    thumbnails = None
+    if request.args.get("thumbnail") == "1":
+        thumbnails = station.thumbnail_profile(request.args.get("thumbnail_interval", type=float),
+                                               request.args.get("thumbnail_width", type=int))
+    return Response(gen_landmarks(station, thumbnails), mimetype='application/octet-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of latency histograms and pipeline counters for all stations"""
+    if metrics is None:
+        abort(404, description="Metrics are disabled (METRICS=0)")
+    return Response(metrics.render(pipeline_metric_families()), content_type=Metrics.CONTENT_TYPE)
+
+@app.route('/pipeline_stats', defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/pipeline_stats')
+def pipeline_stats(station_id):
+    """Per-stage queue depth and drop counters for the frame pipeline"""
+    return jsonify(get_station(station_id).pipeline.stats())
+
+@app.route('/governor', defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/governor')
+def governor_status(station_id):
+    """Current inference operating point (model complexity, stride, latency, ROI)"""
+    station = get_station(station_id)
+    if station.person_tracker is not None:
+        status = station.person_tracker.operating_point()  # The governor is bypassed in this mode
     else:
-        angle = current_elbow_angle
-    
-    data = {
-        "pushup_count": pushup_count,
-        "pushup_stage": pushup_stage,
-        "curl_count_r": curl_count_r,
-        "curl_count_l": curl_count_l,
-        "curl_stage_r": curl_stage_r,
-        "curl_stage_l": curl_stage_l,
-        "squat_count": squat_count,
-        "squat_stage": squat_stage,
-        "plank_time": plank_time,
-        "mode": mode,
-        "elbow_angle": angle,  # Generic angle display
-        "knee_angle": current_knee_angle,
-        "elbow_angle_r": current_elbow_angle_r,
-        "elbow_angle_l": current_elbow_angle_l,
-        "pushup_good_posture": pushup_good_posture,
-        "pushup_bad_posture": pushup_bad_posture,
-        "curl_r_good_posture": curl_r_good_posture,
-        "curl_r_bad_posture": curl_r_bad_posture,
-        "curl_l_good_posture": curl_l_good_posture,
-        "curl_l_bad_posture": curl_l_bad_posture,
-        "squat_good_posture": squat_good_posture,
-        "squat_bad_posture": squat_bad_posture,
-        "plank_good_posture_time": int(plank_good_posture_time),
-        "plank_bad_posture_time": int(plank_bad_posture_time)
-    }
-    return jsonify(data)
-
-@app.route('/set_mode', methods=['POST'])
-def set_mode():
-    global mode, current_session_start, current_session_mode
+        status = station.governor.status()
+    status["roi"] = station.roi_tracker.status() if station.roi_tracker is not None else None
+    status["people"] = station.person_tracker.status() if station.person_tracker is not None else None
+    return jsonify(status)
+
+@app.route('/pose_data', defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/pose_data')
+def pose_data(station_id):
+    return jsonify(get_station(station_id).state.pose_data)
+
+@app.route('/pose_stream', defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/pose_stream')
+def pose_stream(station_id):
+    """Server-Sent Events: one full pose_data snapshot, then only the keys that change"""
+    station = get_station(station_id)
+    start_station(station)
+
+    def stream():
+        with station.pose_updates.subscribe() as subscriber:
+            yield f"data: {json.dumps(station.state.pose_data)}\n\n"
+            while True:
+                delta = subscriber.get(timeout=15.0)
+                if delta is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(delta)}\n\n"
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/set_mode', methods=['POST'], defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/set_mode', methods=['POST'])
+def set_mode(station_id):
+    station = get_station(station_id)
     data = request.get_json()
     if 'mode' in data:
-        # Save previous session if mode changed
-        if current_session_start and current_session_mode and current_session_mode != data['mode']:
-            save_current_session()
-        mode = data['mode']
-        # Start new session if not already started
-        if not current_session_start:
-            current_session_start = datetime.now().isoformat()
-            current_session_mode = mode
+        mode = station.run_command(switch_mode, station, data['mode'])
         return jsonify({"status": "success", "mode": mode})
     return jsonify({"status": "error", "message": "Mode not provided"}), 400
 
-def save_current_session():
-    """Save the current workout session"""
-    global pushup_count, curl_count_r, curl_count_l, squat_count, plank_time
-    global current_session_start, current_session_mode
-    global pushup_good_posture, pushup_bad_posture
-    global curl_r_good_posture, curl_r_bad_posture, curl_l_good_posture, curl_l_bad_posture
-    global squat_good_posture, squat_bad_posture
-    global plank_good_posture_time, plank_bad_posture_time
-    if not current_session_start:
+# ------------------ Station Commands ------------------
+# Run on the station's frame loop via Station.run_command, never directly from a request thread
+def switch_mode(station, mode):
+    # Save previous session if mode changed
+    if station.current_session_start and station.current_session_mode and station.current_session_mode != mode:
+        save_current_session(station)
+    station.mode = mode
+    # Start new session if not already started
+    if not station.current_session_start:
+        station.current_session_start = datetime.now().isoformat()
+        station.current_session_mode = station.mode
+    return station.mode
+
+def begin_session(station, record):
+    # Save previous session if exists
+    if station.current_session_start:
+        save_current_session(station)
+
+    # Reset counters
+    station.reset_counters()
+
+    # Start new session
+    station.current_session_start = datetime.now().isoformat()
+    station.current_session_mode = station.mode
+    if record:
+        station.start_recording(station.current_session_start)
+    return station.current_session_start
+
+def finish_session(station):
+    """Save and close the active session; None if there is none"""
+    if not station.current_session_start:
+        return None
+    session_data = save_current_session(station)
+    station.current_session_start = None
+    return session_data
+
+def save_current_session(station):
+    """Save the station's current workout session"""
+    if not station.current_session_start:
         return
-    
-    # Calculate total reps based on mode
-    if current_session_mode == "Push-Up":
-        total_reps = pushup_count
-    elif current_session_mode == "Curl":
-        total_reps = curl_count_r + curl_count_l
-    elif current_session_mode == "Squat":
-        total_reps = squat_count
-    elif current_session_mode == "Plank":
-        total_reps = plank_time  # For plank, use time as "reps"
-    else:
-        total_reps = 0
-    
+
     session_data = {
-        "id": len(workout_sessions) + 1,
-        "mode": current_session_mode,
-        "start_time": current_session_start,
+        "mode": station.current_session_mode,
+        "start_time": station.current_session_start,
         "end_time": datetime.now().isoformat(),
-        "pushup_count": pushup_count,
-        "curl_count_r": curl_count_r,
-        "curl_count_l": curl_count_l,
-        "squat_count": squat_count,
-        "plank_time": plank_time,
-        "total_reps": total_reps,
-        "pushup_good_posture": pushup_good_posture,
-        "pushup_bad_posture": pushup_bad_posture,
-        "curl_r_good_posture": curl_r_good_posture,
-        "curl_r_bad_posture": curl_r_bad_posture,
-        "curl_l_good_posture": curl_l_good_posture,
-        "curl_l_bad_posture": curl_l_bad_posture,
-        "squat_good_posture": squat_good_posture,
-        "squat_bad_posture": squat_bad_posture,
-        "plank_good_posture_time": int(plank_good_posture_time),
-        "plank_bad_posture_time": int(plank_bad_posture_time)
+        "total_reps": station.analyzer.total_reps(station.current_session_mode),
+        "station": station.id,
     }
-    workout_sessions.append(session_data)
+    session_data.update(station.analyzer.counters())
+    recording = station.stop_recording()
+    if recording:
+        session_data["recording"] = recording
+    session_store.add(session_data)
     return session_data
 
-@app.route('/start_session', methods=['POST'])
-def start_session():
-    """Start a new workout session"""
-    global current_session_start, current_session_mode
-    global pushup_count, curl_count_r, curl_count_l, squat_count, plank_time, plank_start_time
-    global pushup_good_posture, pushup_bad_posture
-    global curl_r_good_posture, curl_r_bad_posture, curl_l_good_posture, curl_l_bad_posture
-    global squat_good_posture, squat_bad_posture
-    global plank_good_posture_time, plank_bad_posture_time
-    # Save previous session if exists
-    if current_session_start:
-        save_current_session()
-    
-    # Reset counters
-    pushup_count = 0
-    curl_count_r = 0
-    curl_count_l = 0
-    squat_count = 0
-    plank_time = 0
-    plank_start_time = None
-    pushup_good_posture = 0
-    pushup_bad_posture = 0
-    curl_r_good_posture = 0
-    curl_r_bad_posture = 0
-    curl_l_good_posture = 0
-    curl_l_bad_posture = 0
-    squat_good_posture = 0
-    squat_bad_posture = 0
-    plank_good_posture_time = 0
-    plank_bad_posture_time = 0
-    
-    # Start new session
-    current_session_start = datetime.now().isoformat()
-    current_session_mode = mode
-    
-    return jsonify({"status": "success", "session_started": current_session_start})
-
-@app.route('/end_session', methods=['POST'])
-def end_session():
+@app.route('/start_session', methods=['POST'], defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/start_session', methods=['POST'])
+def start_session(station_id):
+    """Start a new workout session; send {"record": true} to record landmarks"""
+    station = get_station(station_id)
+    start_station(station)  # Reps are only counted while frames flow
+    data = request.get_json(silent=True) or {}
+    session_start = station.run_command(begin_session, station, data.get("record", RECORD_LANDMARKS))
+    return jsonify({"status": "success", "session_started": session_start})
+
+@app.route('/end_session', methods=['POST'], defaults={"station_id": DEFAULT_STATION})
+@app.route('/stations/<station_id>/end_session', methods=['POST'])
+def end_session(station_id):
     """End current workout session and save it"""
-    global current_session_start
-    if current_session_start:
-        session_data = save_current_session()
-        current_session_start = None
+    station = get_station(station_id)
+    session_data = station.run_command(finish_session, station)
+    if session_data is not None:
         return jsonify({"status": "success", "session": session_data})
     return jsonify({"status": "error", "message": "No active session"}), 400
 
-@app.route('/get_sessions', methods=['GET'])
-def get_sessions():
-    """Get all workout sessions"""
-    # Include current session if active
-    sessions = workout_sessions.copy()
-    if current_session_start:
-        current_data = {
-            "id": len(sessions) + 1,
-            "mode": current_session_mode,
-            "start_time": current_session_start,
+def session_filters():
+    """mode / since / until query filters shared by the history endpoints"""
+    return {
+        "mode": request.args.get("mode") or None,
+        "since": request.args.get("since") or None,
+        "until": request.args.get("until") or None,
+    }
+
+def session_matches(start_time, mode_name, filters):
+    if not start_time:
+        return False
+    if filters["mode"] and filters["mode"] != mode_name:
+        return False
+    if filters["since"] and start_time < filters["since"]:
+        return False
+    if filters["until"] and start_time >= filters["until"]:
+        return False
+    return True
+
+def active_sessions(filters):
+    """Snapshot of every station's unsaved session matching filters, newest first"""
+    sessions = []
+    for station in stations.values():
+        state = station.state  # One consistent snapshot per station
+        if not session_matches(state.session_start, state.session_mode, filters):
+            continue
+        session_data = {
+            "mode": state.session_mode,
+            "start_time": state.session_start,
             "end_time": None,
-            "pushup_count": pushup_count,
-            "curl_count_r": curl_count_r,
-            "curl_count_l": curl_count_l,
-            "squat_count": squat_count,
-            "plank_time": plank_time,
-            "total_reps": pushup_count if current_session_mode == "Push-Up" else (
-                (curl_count_r + curl_count_l) if current_session_mode == "Curl" else (
-                    squat_count if current_session_mode == "Squat" else plank_time
-                )
-            ),
+            "total_reps": state.total_reps,
+            "station": station.id,
             "is_active": True,
-            "pushup_good_posture": pushup_good_posture,
-            "pushup_bad_posture": pushup_bad_posture,
-            "curl_r_good_posture": curl_r_good_posture,
-            "curl_r_bad_posture": curl_r_bad_posture,
-            "curl_l_good_posture": curl_l_good_posture,
-            "curl_l_bad_posture": curl_l_bad_posture,
-            "squat_good_posture": squat_good_posture,
-            "squat_bad_posture": squat_bad_posture,
-            "plank_good_posture_time": int(plank_good_posture_time),
-            "plank_bad_posture_time": int(plank_bad_posture_time)
         }
-        sessions.append(current_data)
-    return jsonify({"sessions": sessions})
+        session_data.update(state.counters)
+        sessions.append(session_data)
+    sessions.sort(key=lambda session: session["start_time"], reverse=True)
+    next_id = session_store.peek_next_id()
+    for index, session_data in enumerate(sessions):
+        session_data["id"] = next_id + index  # Ids they will most likely be saved under
+    return sessions
 
-@app.route('/get_summary', methods=['GET'])
-def get_summary():
-    """Get workout summary statistics"""
-    all_sessions = workout_sessions.copy()
-    if current_session_start:
-        all_sessions.append({
-            "mode": current_session_mode,
-            "pushup_count": pushup_count,
-            "curl_count_r": curl_count_r,
-            "curl_count_l": curl_count_l,
-            "total_reps": pushup_count if current_session_mode == "Push-Up" else (curl_count_r + curl_count_l),
-            "pushup_good_posture": pushup_good_posture,
-            "pushup_bad_posture": pushup_bad_posture,
-            "curl_r_good_posture": curl_r_good_posture,
-            "curl_r_bad_posture": curl_r_bad_posture,
-            "curl_l_good_posture": curl_l_good_posture,
-            "curl_l_bad_posture": curl_l_bad_posture
-        })
-    
-    if not all_sessions:
-        return jsonify({
+@app.route('/get_sessions', methods=['GET'])
+def get_sessions():
+    """Get one page of workout sessions, newest first.
+
+    Query params: mode, since, until (ISO start_time bounds), limit, offset.
+    Active sessions from every station lead the first page.
+    """
+    filters = session_filters()
+    page_limit = min(max(request.args.get("limit", SESSIONS_PAGE_LIMIT, type=int), 0), SESSIONS_PAGE_MAX)
+    page_offset = max(request.args.get("offset", 0, type=int), 0)
+
+    active = active_sessions(filters)
+    sessions = active[page_offset:page_offset + page_limit]
+    limit = page_limit - len(sessions)
+    offset = max(page_offset - len(active), 0)
+
+    sessions.extend(session_store.list_sessions(limit=limit, offset=offset, **filters))
+    total = session_store.count(**filters) + len(active)
+    return jsonify({"sessions": sessions, "total": total, "limit": page_limit, "offset": page_offset})
+
+@app.route('/get_reps', methods=['GET'])
+def get_reps():
+    """Get one page of individual reps, newest first.
+
+    Query params: mode, since, until (ISO rep_time bounds), station, limit, offset.
+    """
+    filters = session_filters()
+    page_limit = min(max(request.args.get("limit", SESSIONS_PAGE_LIMIT, type=int), 0), SESSIONS_PAGE_MAX)
+    page_offset = max(request.args.get("offset", 0, type=int), 0)
+    reps = session_store.list_reps(station=request.args.get("station") or None,
+                                   limit=page_limit, offset=page_offset, **filters)
+    return jsonify({"reps": reps, "limit": page_limit, "offset": page_offset})
+
+@app.route('/get_rep_stats', methods=['GET'])
+def get_rep_stats():
+    """Per-rep averages (tempo, range of motion, posture) by mode and side.
+
+    Accepts the same mode/since/until filters, applied to rep times, plus station.
+    """
+    stats = session_store.rep_stats(station=request.args.get("station") or None, **session_filters())
+    return jsonify({"stats": stats})
+
+def add_to_summary(by_mode, by_exercise, mode_name, totals):
+    """Fold one mode's session totals into the by_mode and by_exercise breakdowns"""
+    if mode_name not in by_mode:
+        by_mode[mode_name] = {"sessions": 0, "total_reps": 0}
+    by_mode[mode_name]["sessions"] += totals["sessions"]
+    by_mode[mode_name]["total_reps"] += totals["total_reps"]
+
+    # Track by individual exercise type
+    if mode_name == "Push-Up":
+        exercises = (("Push-Up", "pushup_count", "pushup_good_posture", "pushup_bad_posture"),)
+    elif mode_name == "Curl":
+        exercises = (("Curl (Right Arm)", "curl_count_r", "curl_r_good_posture", "curl_r_bad_posture"),
+                     ("Curl (Left Arm)", "curl_count_l", "curl_l_good_posture", "curl_l_bad_posture"))
+    elif mode_name == "Squat":
+        exercises = (("Squat", "squat_count", "squat_good_posture", "squat_bad_posture"),)
+    elif mode_name == "Plank":
+        # For plank, use time as "reps" and posture time as posture counts
+        exercises = (("Plank", "plank_time", "plank_good_posture_time", "plank_bad_posture_time"),)
+    else:
+        exercises = ()
+
+    for name, reps_field, good_field, bad_field in exercises:
+        if name not in by_exercise:
+            by_exercise[name] = {
+                "total_reps": 0,
+                "good_posture": 0,
+                "bad_posture": 0
+            }
+        by_exercise[name]["total_reps"] += totals.get(reps_field) or 0
+        by_exercise[name]["good_posture"] += totals.get(good_field) or 0
+        by_exercise[name]["bad_posture"] += totals.get(bad_field) or 0
+
+def build_summary(filters, active, active_count):
+    """Summary dict from the store's running totals plus the stations' active sessions"""
+    totals_by_mode = session_store.totals_by_mode(**filters)
+
+    by_mode = {}
+    by_exercise = {}
+    total_sessions = 0
+    total_reps = 0
+    for mode_name, totals in totals_by_mode.items():
+        add_to_summary(by_mode, by_exercise, mode_name or "Unknown", totals)
+        total_sessions += totals["sessions"]
+        total_reps += totals["total_reps"]
+
+    for session_data in active:
+        add_to_summary(by_mode, by_exercise, session_data["mode"] or "Unknown", dict(session_data, sessions=1))
+        total_reps += session_data["total_reps"]
+
+    counted_sessions = total_sessions + len(active)
+    if not counted_sessions:
+        return {
             "total_sessions": 0,
             "total_reps": 0,
             "by_mode": {},
             "by_exercise": {},
             "average_reps": 0
-        })
-    
-    total_reps = sum(s.get("total_reps", 0) for s in all_sessions)
-    by_mode = {}
-    by_exercise = {}
-    
-    for session in all_sessions:
-        mode_name = session.get("mode", "Unknown")
-        reps = session.get("total_reps", 0)
-        if mode_name not in by_mode:
-            by_mode[mode_name] = {"sessions": 0, "total_reps": 0}
-        by_mode[mode_name]["sessions"] += 1
-        by_mode[mode_name]["total_reps"] += reps
-        
-        # Track by individual exercise type
-        if mode_name == "Push-Up":
-            if "Push-Up" not in by_exercise:
-                by_exercise["Push-Up"] = {
-                    "total_reps": 0,
-                    "good_posture": 0,
-                    "bad_posture": 0
-                }
-            by_exercise["Push-Up"]["total_reps"] += session.get("pushup_count", 0)
-            by_exercise["Push-Up"]["good_posture"] += session.get("pushup_good_posture", 0)
-            by_exercise["Push-Up"]["bad_posture"] += session.get("pushup_bad_posture", 0)
-        elif mode_name == "Curl":
-            if "Curl (Right Arm)" not in by_exercise:
-                by_exercise["Curl (Right Arm)"] = {
-                    "total_reps": 0,
-                    "good_posture": 0,
-                    "bad_posture": 0
-                }
-            if "Curl (Left Arm)" not in by_exercise:
-                by_exercise["Curl (Left Arm)"] = {
-                    "total_reps": 0,
-                    "good_posture": 0,
-                    "bad_posture": 0
-                }
-            by_exercise["Curl (Right Arm)"]["total_reps"] += session.get("curl_count_r", 0)
-            by_exercise["Curl (Right Arm)"]["good_posture"] += session.get("curl_r_good_posture", 0)
-            by_exercise["Curl (Right Arm)"]["bad_posture"] += session.get("curl_r_bad_posture", 0)
-            by_exercise["Curl (Left Arm)"]["total_reps"] += session.get("curl_count_l", 0)
-            by_exercise["Curl (Left Arm)"]["good_posture"] += session.get("curl_l_good_posture", 0)
-            by_exercise["Curl (Left Arm)"]["bad_posture"] += session.get("curl_l_bad_posture", 0)
-        elif mode_name == "Squat":
-            if "Squat" not in by_exercise:
-                by_exercise["Squat"] = {
-                    "total_reps": 0,
-                    "good_posture": 0,
-                    "bad_posture": 0
-                }
-            by_exercise["Squat"]["total_reps"] += session.get("squat_count", 0)
-            by_exercise["Squat"]["good_posture"] += session.get("squat_good_posture", 0)
-            by_exercise["Squat"]["bad_posture"] += session.get("squat_bad_posture", 0)
-        elif mode_name == "Plank":
-            if "Plank" not in by_exercise:
-                by_exercise["Plank"] = {
-                    "total_reps": 0,
-                    "good_posture": 0,
-                    "bad_posture": 0
-                }
-            # For plank, use time as "reps" and posture time as posture counts
-            by_exercise["Plank"]["total_reps"] += session.get("plank_time", 0)
-            by_exercise["Plank"]["good_posture"] += session.get("plank_good_posture_time", 0)
-            by_exercise["Plank"]["bad_posture"] += session.get("plank_bad_posture_time", 0)
-    
-    return jsonify({
-        "total_sessions": len(workout_sessions),
-        "active_sessions": 1 if current_session_start else 0,
+        }
+
+    # The default station's session is the "current" one when it is active
+    current = next((s for s in active if s["station"] == DEFAULT_STATION), active[0] if active else None)
+    return {
+        "total_sessions": total_sessions,
+        "active_sessions": active_count,
         "total_reps": total_reps,
         "by_mode": by_mode,
         "by_exercise": by_exercise,
-        "average_reps": total_reps / len(all_sessions) if all_sessions else 0,
+        "average_reps": total_reps / counted_sessions,
         "current_session": {
-            "mode": current_session_mode,
-            "reps": pushup_count if current_session_mode == "Push-Up" else (curl_count_r + curl_count_l),
-            "start_time": current_session_start,
-            "pushup_good_posture": pushup_good_posture,
-            "pushup_bad_posture": pushup_bad_posture,
-            "curl_r_good_posture": curl_r_good_posture,
-            "curl_r_bad_posture": curl_r_bad_posture,
-            "curl_l_good_posture": curl_l_good_posture,
-            "curl_l_bad_posture": curl_l_bad_posture
-        } if current_session_start else None
-    })
+            "mode": current["mode"],
+            "station": current["station"],
+            "reps": current["total_reps"],
+            "start_time": current["start_time"],
+            "pushup_good_posture": current["pushup_good_posture"],
+            "pushup_bad_posture": current["pushup_bad_posture"],
+            "curl_r_good_posture": current["curl_r_good_posture"],
+            "curl_r_bad_posture": current["curl_r_bad_posture"],
+            "curl_l_good_posture": current["curl_l_good_posture"],
+            "curl_l_bad_posture": current["curl_l_bad_posture"]
+        } if current else None
+    }
+
+@app.route('/get_summary', methods=['GET'])
+def get_summary():
+    """Get workout summary statistics (accepts the same mode/since/until filters).
+
+    Responses carry an ETag derived from the store version and the active
+    sessions' counters, so an unchanged poll is answered with 304.
+    """
+    filters = session_filters()
+    active = active_sessions(filters)
+    active_count = sum(1 for station in stations.values() if station.state.session_start)
+
+    filter_key = tuple(filters.values())
+    state = (session_store.version, filter_key, active_count,
+             [tuple(session_data.values()) for session_data in active])
+    etag = f"{SUMMARY_ETAG_PREFIX}-{session_store.version}-{zlib.crc32(repr(state).encode()):08x}"
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        cached = summary_cache.get(filter_key)
+        if cached and cached[0] == etag:
+            body = cached[1]
+        else:
+            body = jsonify(build_summary(filters, active, active_count)).get_data()
+            if len(summary_cache) > 32:
+                summary_cache.clear()
+            summary_cache[filter_key] = (etag, body)
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"  # Always revalidate, never serve stale
+    return response
 
 @app.route('/')
 def index():
     return "Workout Pose Detection Running!"
 
+@app.route('/ready')
+def ready():
+    """Streaming readiness: 200 when every station is ready, else 503.
+
+    A station is ready once its pose model has loaded and its camera has not
+    failed to open. Cameras open on the first stream, so a camera that was
+    never tried doesn't count against readiness; one whose last open failed
+    does, until a later stream opens it. With WARMUP=0 models load on the
+    first stream, so this stays 503 until each station has streamed.
+    History, summary and rep endpoints work regardless.
+    """
+    readiness = [station.readiness() for station in stations.values()]
+    for station in readiness:
+        station["ready"] = station["model"] == "ready" and station["camera_error"] is None
+    is_ready = all(station["ready"] for station in readiness)
+    return jsonify({"ready": is_ready, "stations": readiness}), 200 if is_ready else 503
+
+# ------------------ Lifecycle ------------------
+_lifecycle_lock = threading.Lock()
+_engine_started = False
+_shut_down = False
+
+def warm_up_stations():
+    for station in stations.values():
+        station.warm_up()  # Logs and keeps any failure; the frame loop retries it
+
+def start_engine():
+    """Register shutdown and load the pose models in the background, once.
+
+    Returns immediately so the server binds its port right away; cameras
+    open on each station's first stream (see start_station).
+    """
+    global _engine_started
+    with _lifecycle_lock:
+        if _engine_started or _shut_down:
+            return
+        _engine_started = True
+        atexit.register(shutdown)
+    if WARMUP:
+        threading.Thread(target=warm_up_stations, name="warm-up", daemon=True).start()
+
+def shutdown():
+    """Save active sessions, stop the pipelines, release the cameras and flush the store"""
+    global _shut_down
+    with _lifecycle_lock:
+        if _shut_down:
+            return
+        _shut_down = True
+    for station in stations.values():
+        station.run_command(finish_session, station)
+        station.close()
+    session_store.close()
+
+def serve():
+    start_engine()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # Unwind through shutdown()
+    print(f"Starting {SERVER} server on http://{HOST}:{PORT}")
+    try:
+        if SERVER == "dev":
+            # The reloader would import this module twice, loading every model twice
+            app.run(host=HOST, port=PORT, debug=True, use_reloader=False, threaded=True)
+        elif SERVER == "waitress":
+            try:
+                from waitress import serve as waitress_serve
+            except ImportError:
+                raise SystemExit("SERVER=waitress needs the waitress package (pip install waitress); "
+                                 "use SERVER=dev for the development server")
+            waitress_serve(app, host=HOST, port=PORT, threads=SERVER_THREADS)
+        else:
+            raise SystemExit(f"Unknown SERVER {SERVER!r}; choose waitress or dev")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown()
+
 if __name__ == '__main__':
-    print("Starting Flask server on http://127.0.0.1:5000")
-    app.run(debug=True)
+    serve()
@@ -0,0 +1,167 @@
+# batch_analyze.py
+"""Offline rep counting and posture scoring for a directory of recorded workout videos.
+
+Usage:
+    python batch_analyze.py VIDEO_DIR --output results.jsonl --workers 8
+
+Each video is scored with the same WorkoutAnalyzer state machines that drive
+/video_feed. Files are spread across a process pool with one Pose graph per
+worker, and one JSON line per file is appended to the output as soon as it
+finishes, so an interrupted run can be resumed.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+
+import cv2
+import mediapipe as mp
+
+from angles import LandmarkBuffer
+from analyzer import MODES, WorkoutAnalyzer
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+
+# ------------------ Worker State ------------------
+_pose = None  # One Pose graph per worker process
+
+
+def _init_worker(model_complexity):
+    global _pose
+    # Parallelism comes from the process pool; keep OpenCV from oversubscribing cores
+    cv2.setNumThreads(1)
+    _pose = mp.solutions.pose.Pose(static_image_mode=False,
+                                   model_complexity=model_complexity,
+                                   enable_segmentation=False,
+                                   min_detection_confidence=0.5,
+                                   min_tracking_confidence=0.5)
+
+
+# ------------------ Analysis ------------------
+def analyze_video(path, modes=MODES, pose=None):
+    """Score one video file with every state machine in `modes`"""
+    pose = pose or _pose
+    pose.reset()  # Don't carry tracking over from the previous file
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return {"file": path, "error": "Cannot open video"}
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    analyzers = {m: WorkoutAnalyzer() for m in modes}
+    landmark_buffer = LandmarkBuffer()
+    frames = 0
+    detected = 0
+    try:
+        while True:
+            success, img = cap.read()
+            if not success:
+                break
+            frames += 1
+            results = pose.process(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+            if not results.pose_landmarks:
+                continue
+            detected += 1
+            pts = landmark_buffer.fill(results.pose_landmarks)
+            now = frames / fps  # Video time, not processing time
+            for m, analyzer in analyzers.items():
+                analyzer.update(pts, m, now)
+    finally:
+        cap.release()
+
+    return {
+        "file": path,
+        "frames": frames,
+        "detected_frames": detected,
+        "fps": fps,
+        "duration": frames / fps,
+        "by_mode": {m: dict(a.counters(), total_reps=a.total_reps(m))
+                    for m, a in analyzers.items()},
+    }
+
+
+def _analyze_task(args):
+    path, modes = args
+    try:
+        return analyze_video(path, modes)
+    except Exception as exc:
+        return {"file": path, "error": str(exc)}
+
+
+def find_videos(video_dir):
+    """All video files below video_dir, in a stable order"""
+    paths = []
+    for root, _, files in os.walk(video_dir):
+        for name in files:
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def _completed_files(output_path):
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from an interrupted run
+            if "error" not in record:
+                done.add(record["file"])
+    return done
+
+
+def analyze_directory(video_dir, output_path, workers=None, modes=MODES,
+                      model_complexity=2, resume=True):
+    """Score every video under video_dir across a process pool.
+
+    Appends one JSON line per file to output_path and returns the number of
+    files processed. With resume, files already scored in output_path are skipped.
+    """
+    done = _completed_files(output_path) if resume else set()
+    todo = [p for p in find_videos(video_dir) if p not in done]
+    if not todo:
+        return 0
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    tasks = [(path, tuple(modes)) for path in todo]
+    processed = 0
+    with open(output_path, "a") as out, \
+            multiprocessing.Pool(workers, initializer=_init_worker,
+                                 initargs=(model_complexity,)) as pool:
+        for result in pool.imap_unordered(_analyze_task, tasks):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            processed += 1
+            status = result.get("error") or f"{result['detected_frames']}/{result['frames']} frames"
+            print(f"[{processed}/{len(todo)}] {result['file']}: {status}")
+    return processed
+
+
+# ------------------ CLI ------------------
+def main():
+    parser = argparse.ArgumentParser(description="Score recorded workout videos offline")
+    parser.add_argument("video_dir", help="Directory searched recursively for video files")
+    parser.add_argument("--output", default="batch_results.jsonl",
+                        help="JSON Lines file to append per-file results to")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: all cores)")
+    parser.add_argument("--mode", action="append", choices=MODES,
+                        help="Exercise to score; repeat for several (default: all)")
+    parser.add_argument("--model-complexity", type=int, default=2, choices=(0, 1, 2))
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Re-score files already present in the output")
+    args = parser.parse_args()
+
+    processed = analyze_directory(args.video_dir, args.output,
+                                  workers=args.workers,
+                                  modes=args.mode or MODES,
+                                  model_complexity=args.model_complexity,
+                                  resume=not args.no_resume)
+    print(f"Scored {processed} file(s) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
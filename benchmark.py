@@ -0,0 +1,308 @@
+# benchmark.py
+"""Headless benchmark for the frame pipeline.
+
+Usage:
+    python benchmark.py                                  # synthetic 640x480 frames
+    python benchmark.py --video clips/squats.mp4 --output bench.json
+
+Runs two phases on the same source, without a camera or display:
+
+1. Stage timings: frames go through the pipeline's stages one after another
+   (capture, colour conversion, pose.process, exercise logic, skeleton draw,
+   JPEG encode) and each stage's latency percentiles are reported. Frames
+   where MediaPipe finds nobody (always the case for synthetic frames) use a
+   generated skeleton, so the logic and draw stages are still exercised.
+2. End to end: a Station's threaded FramePipeline runs for --duration seconds
+   with one MJPEG viewer attached, the source paced like a camera (--fps);
+   reports captured, inferred and delivered FPS.
+
+Results (plus peak RSS and library versions) are written as JSON so runs can
+be diffed between releases.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from analyzer import MODES, WorkoutAnalyzer
+from angles import LandmarkBuffer
+from encoder import DEFAULT_QUALITY, JpegEncoder, make_profile
+from station import Station, draw_skeleton, make_pose
+
+STAGES = ("capture", "color_convert", "pose_process", "exercise_logic", "draw", "encode")
+PERCENTILES = (50, 90, 99)
+
+# Standing figure in normalized coordinates, indexed like MediaPipe's 33 landmarks
+_BASE_POSE = (
+    (0.50, 0.20), (0.51, 0.19), (0.52, 0.19), (0.53, 0.19), (0.49, 0.19), (0.48, 0.19), (0.47, 0.19),
+    (0.54, 0.20), (0.46, 0.20), (0.51, 0.23), (0.49, 0.23),
+    (0.58, 0.30), (0.42, 0.30), (0.60, 0.42), (0.40, 0.42), (0.60, 0.54), (0.40, 0.54),
+    (0.60, 0.56), (0.40, 0.56), (0.61, 0.56), (0.39, 0.56), (0.59, 0.55), (0.41, 0.55),
+    (0.55, 0.55), (0.45, 0.55), (0.55, 0.72), (0.45, 0.72), (0.55, 0.90), (0.45, 0.90),
+    (0.55, 0.92), (0.45, 0.92), (0.57, 0.93), (0.43, 0.93),
+)
+_ARMS = ((11, 13, (15, 17, 19, 21)), (12, 14, (16, 18, 20, 22)))  # shoulder, elbow, wrist + hand points
+
+
+# ------------------ Sources ------------------
+class SyntheticSource:
+    """cv2.VideoCapture stand-in cycling through pre-generated frames"""
+
+    fps = 30.0
+
+    def __init__(self, width=640, height=480, variants=8):
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(variants)]
+        self.index = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        img = self.frames[self.index % len(self.frames)].copy()  # Drawing mutates the frame
+        self.index += 1
+        return True, img
+
+    def release(self):
+        pass
+
+
+class VideoSource:
+    """Video file that loops at the end, so runs can be longer than the clip"""
+
+    def __init__(self, path):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        success, img = self.cap.read()
+        if not success:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = self.cap.read()
+        return success, img
+
+    def release(self):
+        self.cap.release()
+
+
+class PacedSource:
+    """Delivers another source's frames no faster than `fps`, like a real camera"""
+
+    def __init__(self, source, fps):
+        self.source = source
+        self.fps = fps
+        self._next_read = time.perf_counter()
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def read(self):
+        self._next_read = max(self._next_read + 1.0 / self.fps, time.perf_counter() - 1.0)
+        delay = self._next_read - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        return self.source.read()
+
+    def release(self):
+        self.source.release()
+
+
+def synthetic_landmarks(frame_index, period=60):
+    """Standing skeleton curling both arms, for frames where nobody was detected"""
+    points = [list(p) for p in _BASE_POSE]
+    elbow_angle = math.radians(45 + 125 * (0.5 + 0.5 * math.cos(2 * math.pi * frame_index / period)))
+    for shoulder, elbow, hand in _ARMS:
+        ux, uy = points[shoulder][0] - points[elbow][0], points[shoulder][1] - points[elbow][1]
+        norm = math.hypot(ux, uy)
+        side = 1 if points[elbow][0] > 0.5 else -1
+        c, s = math.cos(side * elbow_angle), math.sin(side * elbow_angle)
+        wx = points[elbow][0] + 0.12 * (c * ux - s * uy) / norm
+        wy = points[elbow][1] + 0.12 * (s * ux + c * uy) / norm
+        for index in hand:
+            points[index] = [wx, wy]
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y in points:
+        landmarks.landmark.add(x=x, y=y, z=0.0, visibility=1.0)
+    return landmarks
+
+
+# ------------------ Measurement ------------------
+def summarize(samples):
+    """Latency percentiles in milliseconds"""
+    ms = np.asarray(samples, dtype=np.float64) * 1000
+    if not len(ms):
+        return None
+    summary = {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in PERCENTILES}
+    summary["mean_ms"] = round(float(ms.mean()), 3)
+    summary["max_ms"] = round(float(ms.max()), 3)
+    return summary
+
+
+def measure_stages(source, frames, warmup, model_complexity, mode, quality, encoder_backend):
+    """Time each pipeline stage on `frames` sequential frames"""
+    pose = make_pose(model_complexity)
+    analyzer = WorkoutAnalyzer()
+    encoder = JpegEncoder(encoder_backend)
+    profile = make_profile(quality)
+    landmark_buffer = LandmarkBuffer()
+    fps = getattr(source, "fps", None) or 30.0
+    timings = {stage: [] for stage in STAGES}
+    detected = 0
+    clock = time.perf_counter
+
+    try:
+        for i in range(warmup + frames):
+            t0 = clock()
+            success, img = source.read()
+            t1 = clock()
+            if not success:
+                raise RuntimeError("Frame source stopped delivering frames")
+            rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            t2 = clock()
+            results = pose.process(rgb)
+            t3 = clock()
+            landmarks = results.pose_landmarks
+            if landmarks is not None:
+                detected += i >= warmup
+            else:
+                landmarks = synthetic_landmarks(i)
+            t3b = clock()  # Exclude building the stand-in skeleton
+            analyzer.update(landmark_buffer.fill(landmarks), mode, i / fps)
+            t4 = clock()
+            draw_skeleton(img, landmarks)
+            t5 = clock()
+            encoder.encode(img, profile)
+            t6 = clock()
+            if i < warmup:
+                continue
+            for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3b, t5 - t4, t6 - t5)):
+                timings[stage].append(elapsed)
+    finally:
+        pose.close()
+
+    totals = [sum(values) for values in zip(*timings.values())]
+    return {
+        "frames": frames,
+        "detected_frames": detected,
+        "encoder": encoder.backend,
+        "stages": {stage: summarize(values) for stage, values in timings.items()},
+        "total": summarize(totals),
+        "sequential_fps": round(len(totals) / sum(totals), 2) if totals else None,
+    }
+
+
+def measure_end_to_end(source, duration, model_complexity, quality, encoder_backend):
+    """Run a full threaded Station pipeline with one viewer for `duration` seconds"""
+    station = Station("benchmark", source, max_complexity=model_complexity, adaptive=False,
+                      jpeg_quality=quality, jpeg_encoder=encoder_backend)
+    pipeline = station.pipeline
+    delivered = 0
+    with pipeline.output.subscribe() as viewer:
+        pipeline.start()
+        while viewer.get(timeout=5.0) is None:  # Wait out model load before timing
+            if not pipeline.running:
+                raise RuntimeError("Pipeline stopped before producing a frame")
+        before = pipeline.stats()
+        started = time.perf_counter()
+        while time.perf_counter() - started < duration:
+            if viewer.get(timeout=1.0) is not None:
+                delivered += 1
+        elapsed = time.perf_counter() - started
+        after = pipeline.stats()
+    pipeline.stop()
+
+    def rate(stage):
+        return round((after[stage]["frames"] - before[stage]["frames"]) / elapsed, 2)
+
+    return {
+        "duration_s": round(elapsed, 2),
+        "capture_fps": rate("capture"),
+        "inference_fps": rate("inference"),
+        "delivered_fps": round(delivered / elapsed, 2),
+        "capture_dropped": after["capture"]["dropped"] - before["capture"]["dropped"],
+        "inference_latency_ms": station.governor.status()["latency_ms"],
+    }
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)  # bytes on macOS, KiB on Linux
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "mediapipe": mp.__version__,
+        "numpy": np.__version__,
+    }
+
+
+# ------------------ CLI ------------------
+def make_source(args):
+    if args.video:
+        source = VideoSource(args.video)
+        if not source.isOpened():
+            raise SystemExit(f"Cannot open video {args.video}")
+        return source
+    return SyntheticSource(args.width, args.height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pose pipeline without a camera")
+    parser.add_argument("--video", help="Video file to use instead of synthetic frames")
+    parser.add_argument("--width", type=int, default=640, help="Synthetic frame width")
+    parser.add_argument("--height", type=int, default=480, help="Synthetic frame height")
+    parser.add_argument("--fps", type=float,
+                        help="Camera rate for the end-to-end run (default: the video's, or 30; 0 = unpaced)")
+    parser.add_argument("--frames", type=int, default=300, help="Frames timed in the stage phase")
+    parser.add_argument("--warmup", type=int, default=30, help="Untimed frames before the stage phase")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of end-to-end run (0 to skip)")
+    parser.add_argument("--model-complexity", type=int, default=1, choices=(0, 1, 2),
+                        help="Pose model (2 downloads the heavy model on first use)")
+    parser.add_argument("--mode", choices=MODES, default="Curl", help="Exercise logic to run")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="JPEG quality")
+    parser.add_argument("--encoder", default="auto", help="JPEG encoder: auto, turbojpeg or opencv")
+    parser.add_argument("--output", default="benchmark.json", help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    report = {
+        "source": args.video or f"synthetic {args.width}x{args.height}",
+        "model_complexity": args.model_complexity,
+        "mode": args.mode,
+        "stage_timings": measure_stages(make_source(args), args.frames, args.warmup, args.model_complexity,
+                                        args.mode, args.quality, args.encoder),
+    }
+    if args.duration > 0:
+        source = make_source(args)
+        fps = source.fps if args.fps is None else args.fps
+        if fps:
+            source = PacedSource(source, fps)
+        report["end_to_end"] = measure_end_to_end(source, args.duration, args.model_complexity,
+                                                  args.quality, args.encoder)
+        report["end_to_end"]["source_fps"] = fps or None
+    report["peak_rss_mb"] = peak_rss_mb()
+    report["environment"] = environment()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+# encoder.py
+"""Frame encoding for the video and landmark streams.
+
+Clients pick a profile (quality, width); profiles are quantized so clients
+asking for nearly the same thing share one encoded buffer per frame. Encoding
+uses libjpeg-turbo through PyTurboJPEG when it is installed and falls back to
+OpenCV otherwise.
+
+The landmark stream is a sequence of binary messages, each a 5-byte header
+(uint8 type, uint32 little-endian payload length) followed by the payload:
+
+    MSG_NO_POSE     empty; no person in the latest inferred frame
+    MSG_LANDMARKS   33 x (x, y, z, visibility) float16, normalized coordinates
+    MSG_THUMBNAIL   JPEG of the raw frame (no overlay), sent at a low rate
+"""
+import struct
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+try:
+    from turbojpeg import TurboJPEG
+except ImportError:  # Optional: pip install PyTurboJPEG (needs the libjpeg-turbo library)
+    TurboJPEG = None
+
+DEFAULT_QUALITY = 80
+MIN_QUALITY = 10
+QUALITY_STEP = 5
+MIN_WIDTH = 160
+MAX_WIDTH = 1920  # Caps the number of distinct profiles clients can create
+WIDTH_STEP = 32
+BACKENDS = ("auto", "turbojpeg", "opencv")
+MJPEG_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+THUMBNAIL_QUALITY = 50
+THUMBNAIL_WIDTH = 192
+THUMBNAIL_INTERVAL = 1.0  # Seconds between thumbnails
+INTERVAL_STEP = 0.25
+
+MSG_NO_POSE = 0
+MSG_LANDMARKS = 1
+MSG_THUMBNAIL = 2
+_MESSAGE_HEADER = struct.Struct("<BI")
+
+
+class EncodeProfile(namedtuple("EncodeProfile", "quality width kind interval", defaults=(None, "mjpeg", 0.0))):
+    """JPEG quality, output width (None = capture width), kind and minimum seconds between frames.
+
+    kind "mjpeg" is the annotated frame as a multipart chunk for /video_feed;
+    "thumbnail" is the raw frame as a landmark-stream message.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        name = f"q{self.quality}" + (f"-w{self.width}" if self.width else "")
+        if self.kind != "mjpeg":
+            name = f"{self.kind}-{name}"
+        return name + (f"-{self.interval:g}s" if self.interval else "")
+
+
+def make_profile(quality=None, width=None, default_quality=DEFAULT_QUALITY, kind="mjpeg", interval=0.0):
+    """Clamp and quantize client-requested settings into a shareable profile"""
+    if quality is None:
+        quality = default_quality
+    quality = min(max(int(round(quality / QUALITY_STEP)) * QUALITY_STEP, MIN_QUALITY), 100)
+    if width:
+        width = min(max(int(width) // WIDTH_STEP * WIDTH_STEP, MIN_WIDTH), MAX_WIDTH)
+    if interval:
+        interval = min(max(round(interval / INTERVAL_STEP) * INTERVAL_STEP, INTERVAL_STEP), 60.0)
+    return EncodeProfile(quality, width or None, kind, interval or 0.0)
+
+
+def thumbnail_profile(interval=THUMBNAIL_INTERVAL, width=THUMBNAIL_WIDTH, quality=THUMBNAIL_QUALITY):
+    return make_profile(quality, width, kind="thumbnail", interval=interval)
+
+
+def mjpeg_part(jpeg):
+    """One multipart/x-mixed-replace part, built once and sent to every client as-is"""
+    return b''.join((MJPEG_PART_HEADER, jpeg, b'\r\n'))
+
+
+def pack_message(kind, payload=b''):
+    return _MESSAGE_HEADER.pack(kind, len(payload)) + payload
+
+
+def pack_landmarks(pts):
+    """MSG_LANDMARKS message for (33, 4) landmarks; missing columns are zero-filled"""
+    packed = np.zeros((pts.shape[0], 4), dtype="<f2")
+    packed[:, :pts.shape[1]] = pts
+    return pack_message(MSG_LANDMARKS, packed.tobytes())
+
+
+NO_POSE_MESSAGE = pack_message(MSG_NO_POSE)
+
+
+class JpegEncoder:
+    """Encodes BGR frames to JPEG with libjpeg-turbo if available, else OpenCV"""
+
+    def __init__(self, backend="auto"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JPEG encoder {backend!r}; choose from {', '.join(BACKENDS)}")
+        self._turbo = None
+        if backend != "opencv":
+            if TurboJPEG is None:
+                if backend == "turbojpeg":
+                    raise RuntimeError("JPEG_ENCODER=turbojpeg needs the PyTurboJPEG package")
+            else:
+                try:
+                    self._turbo = TurboJPEG()
+                except OSError:  # Binding installed but libjpeg-turbo itself is missing
+                    if backend == "turbojpeg":
+                        raise
+        self.backend = "turbojpeg" if self._turbo is not None else "opencv"
+
+    def encode(self, img, profile):
+        """JPEG bytes for img at the profile's quality, downscaled to its width"""
+        h, w = img.shape[:2]
+        if profile.width and profile.width < w:
+            img = cv2.resize(img, (profile.width, max(1, round(h * profile.width / w))),
+                             interpolation=cv2.INTER_AREA)
+        if self._turbo is not None:
+            return self._turbo.encode(img, quality=profile.quality)
+        ret, buffer = cv2.imencode('.jpg', img, (cv2.IMWRITE_JPEG_QUALITY, profile.quality))
+        return buffer.tobytes()
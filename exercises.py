@@ -0,0 +1,341 @@
+# exercises.py
+"""Per-exercise rep counting state machines.
+
+Each exercise is a small __slots__ class registered under its mode name with
+@register_exercise. It declares the joint angles and landmarks it needs;
+WorkoutAnalyzer hands it exactly those, plus the session counters to update,
+so adding an exercise never touches the frame loop. Joint angles are smoothed
+with the per-joint filters chosen in `smoothing` (see filters.py).
+
+All timing (plank durations, rep tempo) comes from the shared FrameClock, which
+is driven by the frames' own timestamps rather than by how often frames are
+processed, so inference rate and frame skipping don't distort the metrics.
+
+Every completed push-up, curl and squat rep is also appended as a RepEvent to
+the analyzer's `rep_events` list, for whoever owns the analyzer to persist.
+"""
+import collections
+
+from angles import (JOINT_INDEX, LEFT_ANKLE, LEFT_ELBOW, LEFT_HIP, LEFT_SHOULDER,
+                    RIGHT_ANKLE, RIGHT_ELBOW, RIGHT_HIP, RIGHT_SHOULDER)
+from filters import make_filter
+
+EXERCISES = {}  # mode name -> Exercise subclass, in registration order
+MAX_FRAME_GAP = 1.0  # Seconds; longer gaps (person lost, camera stall) count as this much
+
+
+def register_exercise(cls):
+    """Class decorator adding an Exercise subclass to the registry under cls.mode.
+
+    Resolves the exercise's joint names to angle positions once, here, so the
+    per-frame dispatch only indexes precomputed tuples.
+    """
+    cls.joint_index = tuple(JOINT_INDEX[name] for name in cls.joints)
+    EXERCISES[cls.mode] = cls
+    return cls
+
+
+# ------------------ Shared State ------------------
+class RepEvent(collections.namedtuple(
+        "RepEvent", "mode side start bottom end min_angle max_angle posture good")):
+    """One completed rep.
+
+    start, bottom and end are frame timestamps: leaving the starting position,
+    the smallest joint angle (the bottom of a push-up or squat, the top of a
+    curl) and returning. posture is the worst value seen during the rep: the
+    lowest spine angle for push-ups and squats, the largest elbow drift from
+    the torso (normalized x) for curls. side is "r" / "l" for curls, else None.
+    """
+
+    __slots__ = ()
+
+
+class RepWindow:
+    """Angle extremes and timing of the rep in progress for one joint"""
+
+    __slots__ = ("worst", "start", "bottom", "min_angle", "max_angle", "posture")
+
+    def __init__(self, worst=min):
+        self.worst = worst  # min or max: which posture values are worse
+        self.start = None
+
+    def update(self, t, angle, posture, resting):
+        """Track one frame; while resting (at the starting position) the rep restarts here"""
+        if resting or self.start is None:
+            self.start = self.bottom = t
+            self.min_angle = self.max_angle = angle
+            self.posture = posture
+            return
+        if angle < self.min_angle:
+            self.min_angle = angle
+            self.bottom = t
+        elif angle > self.max_angle:
+            self.max_angle = angle
+        self.posture = self.worst(self.posture, posture)
+
+
+class FrameClock:
+    """Timestamp of the current frame and the time elapsed since the previous one"""
+
+    __slots__ = ("t", "dt")
+
+    def __init__(self):
+        self.t = None
+        self.dt = 0.0
+
+    def tick(self, t):
+        self.dt = 0.0 if self.t is None else min(max(t - self.t, 0.0), MAX_FRAME_GAP)
+        self.t = t
+
+
+class Readout:
+    """Latest smoothed angles for display, shared by all exercises of one analyzer"""
+
+    __slots__ = ("elbow", "elbow_r", "elbow_l", "knee", "rep_seconds")
+
+    def __init__(self):
+        self.elbow = 0  # Push-Up average (Plank writes its alignment metric here)
+        self.elbow_r = 0
+        self.elbow_l = 0
+        self.knee = 0
+        self.rep_seconds = None  # Duration of the last completed rep (tempo), leaving the start position to returning
+
+
+# ------------------ Exercises ------------------
+class Exercise:
+    """One exercise's state machine.
+
+    joints      names from angles.JOINTS; step() receives their angles in this order
+    landmarks   landmark indices; step() receives their x and y in this order
+    joint_index positions of `joints` in compute_angles() output (set by @register_exercise)
+    """
+
+    __slots__ = ("readout", "events")
+    mode = None
+    joints = ()
+    landmarks = ()
+    joint_index = ()
+
+    def __init__(self, thresholds, readout, smoothing, events=None):
+        self.readout = readout
+        self.events = [] if events is None else events  # Completed RepEvents, appended in order
+
+    def step(self, angles, xs, ys, session, clock):
+        """Advance one frame, updating session counters; returns the feedback string"""
+        raise NotImplementedError
+
+    def rep_done(self, clock, window, side=None, good=True):
+        """Record the tempo of the rep tracked by `window`, which ends now, and log its RepEvent"""
+        self.readout.rep_seconds = round(clock.t - window.start, 2)
+        self.events.append(RepEvent(self.mode, side, window.start, window.bottom, clock.t,
+                                    window.min_angle, window.max_angle, window.posture, good))
+
+    def total_reps(self, session):
+        return 0
+
+
+@register_exercise
+class PushUp(Exercise):
+    __slots__ = ("elbow_min", "elbow_max", "stage", "filter_r", "filter_l", "window")
+    mode = "Push-Up"
+    joints = ("r_elbow", "l_elbow", "spine")
+
+    def __init__(self, thresholds, readout, smoothing, events=None):
+        super().__init__(thresholds, readout, smoothing, events)
+        self.elbow_min = thresholds["pushup_elbow_min"]
+        self.elbow_max = thresholds["pushup_elbow_max"]
+        self.stage = None
+        self.filter_r = make_filter(smoothing["r_elbow"])
+        self.filter_l = make_filter(smoothing["l_elbow"])
+        self.window = RepWindow(min)  # Posture: lowest spine angle
+
+    def step(self, angles, xs, ys, session, clock):
+        r_angle, l_angle, spine_angle = angles
+        now = clock.t
+        smoothed_angle = (self.filter_r.update(r_angle, now) + self.filter_l.update(l_angle, now)) / 2
+        self.readout.elbow = int(smoothed_angle)
+        self.window.update(now, smoothed_angle, spine_angle,
+                           self.stage != "down" and smoothed_angle >= self.elbow_max)
+
+        if smoothed_angle <= self.elbow_min and spine_angle > 150:
+            self.stage = "down"
+            return "Go down further"
+        if smoothed_angle >= self.elbow_max and self.stage == "down" and spine_angle > 150:
+            self.stage = "up"
+            session.pushup_count += 1
+            # Track posture quality: good if spine is straight (spine_angle > 150)
+            good = spine_angle > 150
+            if good:
+                session.pushup_good_posture += 1
+            else:
+                session.pushup_bad_posture += 1
+            self.rep_done(clock, self.window, good=good)
+            return "Push up!"
+        return "Good posture"
+
+    def total_reps(self, session):
+        return session.pushup_count
+
+
+@register_exercise
+class Curl(Exercise):
+    __slots__ = ("elbow_min", "elbow_max", "stage_r", "stage_l", "filter_r", "filter_l",
+                 "window_r", "window_l")
+    mode = "Curl"
+    joints = ("r_elbow", "l_elbow")
+    landmarks = (LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW)
+
+    def __init__(self, thresholds, readout, smoothing, events=None):
+        super().__init__(thresholds, readout, smoothing, events)
+        self.elbow_min = thresholds["curl_elbow_min"]
+        self.elbow_max = thresholds["curl_elbow_max"]
+        self.stage_r = None
+        self.stage_l = None
+        self.filter_r = make_filter(smoothing["r_elbow"])
+        self.filter_l = make_filter(smoothing["l_elbow"])
+        self.window_r = RepWindow(max)  # Posture: largest elbow drift from the torso
+        self.window_l = RepWindow(max)
+
+    def step(self, angles, xs, ys, session, clock):
+        r_angle, l_angle = angles
+        now = clock.t
+        l_shoulder_x, r_shoulder_x, l_elbow_x, r_elbow_x = xs
+        torso_x = (l_shoulder_x + r_shoulder_x)/2
+
+        smoothed_r = self.filter_r.update(r_angle, now)
+        self.readout.elbow_r = int(smoothed_r)
+
+        smoothed_l = self.filter_l.update(l_angle, now)
+        self.readout.elbow_l = int(smoothed_l)
+
+        drift_r = abs(r_elbow_x - torso_x)
+        drift_l = abs(l_elbow_x - torso_x)
+        self.window_r.update(now, smoothed_r, drift_r, self.stage_r != "up" and smoothed_r >= self.elbow_max)
+        self.window_l.update(now, smoothed_l, drift_l, self.stage_l != "up" and smoothed_l >= self.elbow_max)
+
+        if smoothed_r <= self.elbow_min and drift_r < 0.1:
+            self.stage_r = "up"
+            feedback_r = "Curl up!"
+        elif smoothed_r >= self.elbow_max and self.stage_r == "up":
+            self.stage_r = "down"
+            session.curl_count_r += 1
+            # Track posture quality: good if elbow stays close to torso
+            good = drift_r < 0.1
+            if good:
+                session.curl_r_good_posture += 1
+            else:
+                session.curl_r_bad_posture += 1
+            self.rep_done(clock, self.window_r, "r", good)
+            feedback_r = "Lower slowly"
+        else:
+            feedback_r = "Good posture"
+
+        if smoothed_l <= self.elbow_min and drift_l < 0.1:
+            self.stage_l = "up"
+            feedback_l = "Curl up!"
+        elif smoothed_l >= self.elbow_max and self.stage_l == "up":
+            self.stage_l = "down"
+            session.curl_count_l += 1
+            # Track posture quality: good if elbow stays close to torso
+            good = drift_l < 0.1
+            if good:
+                session.curl_l_good_posture += 1
+            else:
+                session.curl_l_bad_posture += 1
+            self.rep_done(clock, self.window_l, "l", good)
+            feedback_l = "Lower slowly"
+        else:
+            feedback_l = "Good posture"
+
+        return feedback_r if feedback_r == feedback_l else f"{feedback_r} / {feedback_l}"
+
+    def total_reps(self, session):
+        return session.curl_count_r + session.curl_count_l
+
+
+@register_exercise
+class Squat(Exercise):
+    __slots__ = ("knee_min", "knee_max", "stage", "filter_r", "filter_l", "window")
+    mode = "Squat"
+    joints = ("r_knee", "l_knee", "spine")
+
+    def __init__(self, thresholds, readout, smoothing, events=None):
+        super().__init__(thresholds, readout, smoothing, events)
+        self.knee_min = thresholds["squat_knee_min"]
+        self.knee_max = thresholds["squat_knee_max"]
+        self.stage = None
+        self.filter_r = make_filter(smoothing["r_knee"])
+        self.filter_l = make_filter(smoothing["l_knee"])
+        self.window = RepWindow(min)  # Posture: lowest spine angle
+
+    def step(self, angles, xs, ys, session, clock):
+        r_knee_angle, l_knee_angle, spine_angle = angles
+        now = clock.t
+
+        # Smooth knee angle
+        smoothed_knee_angle = (self.filter_r.update(r_knee_angle, now)
+                               + self.filter_l.update(l_knee_angle, now)) / 2
+        self.readout.knee = int(smoothed_knee_angle)
+        self.window.update(now, smoothed_knee_angle, spine_angle,
+                           self.stage != "down" and smoothed_knee_angle >= self.knee_max)
+
+        # Squat detection
+        if smoothed_knee_angle <= self.knee_min:
+            self.stage = "down"
+            return "Go lower"
+        if smoothed_knee_angle >= self.knee_max and self.stage == "down":
+            self.stage = "up"
+            session.squat_count += 1
+            # Track posture quality: good if spine is relatively straight
+            good = spine_angle > 140
+            if good:
+                session.squat_good_posture += 1
+            else:
+                session.squat_bad_posture += 1
+            self.rep_done(clock, self.window, good=good)
+            return "Stand up!"
+        return "Good posture"
+
+    def total_reps(self, session):
+        return session.squat_count
+
+
+@register_exercise
+class Plank(Exercise):
+    __slots__ = ("alignment_threshold",)
+    mode = "Plank"
+    landmarks = (LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP, LEFT_ANKLE, RIGHT_ANKLE)
+
+    def __init__(self, thresholds, readout, smoothing, events=None):
+        super().__init__(thresholds, readout, smoothing, events)
+        self.alignment_threshold = thresholds["plank_alignment_threshold"]
+
+    def step(self, angles, xs, ys, session, clock):
+        # Calculate alignment - check if shoulders, hips, and ankles are aligned
+        l_shoulder_y, r_shoulder_y, l_hip_y, r_hip_y, l_ankle_y, r_ankle_y = ys
+        shoulder_y = (r_shoulder_y + l_shoulder_y) / 2
+        hip_y = (r_hip_y + l_hip_y) / 2
+        ankle_y = (r_ankle_y + l_ankle_y) / 2
+
+        # Calculate deviation from straight line
+        alignment_deviation = abs(shoulder_y - hip_y) + abs(hip_y - ankle_y)
+
+        # Start tracking time if not started
+        if session.plank_start_time is None:
+            session.plank_start_time = clock.t
+        elapsed = clock.t - session.plank_start_time
+
+        # Track posture quality based on alignment: credit the time since the previous frame
+        if alignment_deviation < self.alignment_threshold:
+            session.plank_good_posture_time += clock.dt
+            feedback = "Perfect plank!"
+        else:
+            session.plank_bad_posture_time += clock.dt
+            feedback = "Keep body straight"
+
+        session.plank_time = int(elapsed)
+        self.readout.elbow = int(alignment_deviation * 1000)  # Use as display metric
+        return feedback
+
+    def total_reps(self, session):
+        return session.plank_time  # For plank, use time as "reps"
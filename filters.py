@@ -0,0 +1,145 @@
+# filters.py
+"""Per-joint angle smoothing filters.
+
+Every filter has update(value, t=None) -> smoothed value, where t is the frame
+time in seconds. Filters are built from short spec strings so they can be
+chosen per joint from config:
+
+    mean[:window]                      moving average over the last `window` values
+    ema[:alpha]                        exponential moving average
+    one_euro[:min_cutoff[:beta]]       One-Euro filter (Casiez et al.): smooth at
+                                       rest, low lag while the joint is moving
+"""
+import math
+import time
+
+from angles import JOINT_NAMES
+
+DEFAULT_WINDOW = 8
+DEFAULT_EMA_ALPHA = 0.3
+ONE_EURO_MIN_CUTOFF = 1.0  # Hz; lower = smoother when still
+ONE_EURO_BETA = 0.05  # Cutoff increase per degree/second of joint speed
+ONE_EURO_D_CUTOFF = 1.0  # Hz, for the speed estimate
+DEFAULT_SMOOTHING = f"mean:{DEFAULT_WINDOW}"
+
+
+class MovingAverage:
+    """Boxcar mean over a preallocated ring buffer with a running sum"""
+
+    __slots__ = ("values", "size", "count", "index", "total")
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.size = int(window)
+        if self.size < 1:
+            raise ValueError("Moving average window must be at least 1")
+        self.values = [0.0] * self.size
+        self.count = 0
+        self.index = 0
+        self.total = 0.0
+
+    def update(self, value, t=None):
+        if self.count == self.size:
+            self.total -= self.values[self.index]
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self.total += value
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+            self.total = sum(self.values)  # Re-sum once per lap so float drift can't build up
+        return self.total / self.count
+
+
+class ExponentialMovingAverage:
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha=DEFAULT_EMA_ALPHA):
+        if not 0 < alpha <= 1:
+            raise ValueError("EMA alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value, t=None):
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class OneEuroFilter:
+    """Adaptive low-pass: the cutoff frequency rises with the joint's angular speed"""
+
+    __slots__ = ("min_cutoff", "beta", "d_cutoff", "value", "speed", "t")
+
+    def __init__(self, min_cutoff=ONE_EURO_MIN_CUTOFF, beta=ONE_EURO_BETA, d_cutoff=ONE_EURO_D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.value = None
+        self.speed = 0.0
+        self.t = None
+
+    @staticmethod
+    def _alpha(dt, cutoff):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, value, t=None):
+        if t is None:
+            t = time.monotonic()
+        if self.value is None:
+            self.value, self.t = value, t
+            return value
+        dt = t - self.t
+        if dt <= 0:
+            return self.value  # Same timestamp twice: nothing new to integrate
+        self.t = t
+        self.speed += self._alpha(dt, self.d_cutoff) * ((value - self.value) / dt - self.speed)
+        cutoff = self.min_cutoff + self.beta * abs(self.speed)
+        self.value += self._alpha(dt, cutoff) * (value - self.value)
+        return self.value
+
+
+FILTERS = {
+    "mean": MovingAverage,
+    "ema": ExponentialMovingAverage,
+    "one_euro": OneEuroFilter,
+}
+
+
+def make_filter(spec=DEFAULT_SMOOTHING):
+    """Build a filter from a spec string such as "mean:8", "ema:0.3" or "one_euro:1.0:0.05" """
+    name, *params = spec.split(":")
+    cls = FILTERS.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown filter {name!r}; choose from {', '.join(FILTERS)}")
+    return cls(*(float(p) for p in params if p))
+
+
+def resolve_smoothing(smoothing=None):
+    """{joint name: filter spec} for every joint.
+
+    smoothing is a spec applied to all joints, or a dict of joint name -> spec
+    where the optional "default" key covers the joints not listed.
+    """
+    if smoothing is None or isinstance(smoothing, str):
+        smoothing = {"default": smoothing or DEFAULT_SMOOTHING}
+    unknown = set(smoothing) - set(JOINT_NAMES) - {"default"}
+    if unknown:
+        raise ValueError(f"Unknown joints: {', '.join(sorted(unknown))}")
+    default = smoothing.get("default", DEFAULT_SMOOTHING)
+    specs = {name: smoothing.get(name, default) for name in JOINT_NAMES}
+    for spec in set(specs.values()):
+        make_filter(spec)  # Fail at configuration time, not on the first frame
+    return specs
+
+
+def parse_smoothing(text):
+    """Parse "one_euro" or "default=mean:8,r_knee=one_euro,l_knee=one_euro" (e.g. from env)"""
+    if not text:
+        return None
+    if "=" not in text:
+        return text
+    return dict(item.split("=", 1) for item in text.split(",") if item)
@@ -5,17 +5,16 @@ export default function PoseData() {
   const [isConnected, setIsConnected] = useState(false);
 
   useEffect(() => {
-    const interval = setInterval(() => {
-      fetch("http://127.0.0.1:5000/pose_data")
-        .then(res => res.json())
-        .then(json => {
-          setData(json);
-          setIsConnected(true);
-        })
-        .catch(() => setIsConnected(false));
-    }, 500); // update every 0.5s
+    // Server pushes a full snapshot, then only the fields that changed
+    const source = new EventSource("http://127.0.0.1:5000/pose_stream");
+    source.onmessage = (event) => {
+      const delta = JSON.parse(event.data);
+      setData(prev => ({ ...prev, ...delta }));
+      setIsConnected(true);
+    };
+    source.onerror = () => setIsConnected(false);
 
-    return () => clearInterval(interval);
+    return () => source.close();
   }, []);
 
   return (
@@ -72,7 +71,7 @@ export default function PoseData() {
             {/* Bottom status indicator */}
             <div className="mt-4 flex items-center justify-between text-xs">
               <div className="flex items-center gap-2 text-blue-500/50">
-                <span className="font-mono">Update Rate: 500ms</span>
+                <span className="font-mono">Update Rate: live</span>
               </div>
               <div className="flex items-center gap-1.5 text-blue-500/50 font-mono">
                 <div className="w-1 h-1 rounded-full bg-blue-600/50" />
@@ -0,0 +1,140 @@
+import React, { useEffect, useRef } from "react";
+
+// Message types from the backend's /landmark_stream (see encoder.py)
+const MSG_NO_POSE = 0;
+const MSG_LANDMARKS = 1;
+const MSG_THUMBNAIL = 2;
+const HEADER_BYTES = 5; // uint8 type + uint32 little-endian payload length
+const NUM_LANDMARKS = 33;
+const MIN_VISIBILITY = 0.5;
+
+// MediaPipe Pose skeleton (mp.solutions.pose.POSE_CONNECTIONS)
+const POSE_CONNECTIONS = [
+  [0, 1], [1, 2], [2, 3], [3, 7], [0, 4], [4, 5], [5, 6], [6, 8], [9, 10],
+  [11, 12], [11, 13], [13, 15], [15, 17], [15, 19], [15, 21], [17, 19],
+  [12, 14], [14, 16], [16, 18], [16, 20], [16, 22], [18, 20],
+  [11, 23], [12, 24], [23, 24], [23, 25], [24, 26], [25, 27], [26, 28],
+  [27, 29], [28, 30], [29, 31], [30, 32], [27, 31], [28, 32],
+];
+
+// IEEE 754 half precision -> number
+function halfToFloat(h) {
+  const sign = h & 0x8000 ? -1 : 1;
+  const exponent = (h >> 10) & 0x1f;
+  const fraction = h & 0x3ff;
+  if (exponent === 0) return sign * 2 ** -14 * (fraction / 1024);
+  if (exponent === 31) return fraction ? NaN : sign * Infinity;
+  return sign * 2 ** (exponent - 15) * (1 + fraction / 1024);
+}
+
+function decodeLandmarks(view, offset) {
+  const points = new Float32Array(NUM_LANDMARKS * 4);
+  for (let i = 0; i < points.length; i++) {
+    points[i] = halfToFloat(view.getUint16(offset + i * 2, true));
+  }
+  return points;
+}
+
+function drawFrame(ctx, thumbnail, points) {
+  const { width, height } = ctx.canvas;
+  ctx.fillStyle = "#09090b";
+  ctx.fillRect(0, 0, width, height);
+  if (thumbnail) {
+    ctx.globalAlpha = 0.6;
+    ctx.drawImage(thumbnail, 0, 0, width, height);
+    ctx.globalAlpha = 1;
+  }
+  if (!points) return;
+
+  const visible = (i) => points[i * 4 + 3] >= MIN_VISIBILITY;
+  ctx.strokeStyle = "#3b82f6";
+  ctx.lineWidth = 3;
+  ctx.beginPath();
+  for (const [a, b] of POSE_CONNECTIONS) {
+    if (!visible(a) || !visible(b)) continue;
+    ctx.moveTo(points[a * 4] * width, points[a * 4 + 1] * height);
+    ctx.lineTo(points[b * 4] * width, points[b * 4 + 1] * height);
+  }
+  ctx.stroke();
+
+  ctx.fillStyle = "#93c5fd";
+  for (let i = 0; i < NUM_LANDMARKS; i++) {
+    if (!visible(i)) continue;
+    ctx.beginPath();
+    ctx.arc(points[i * 4] * width, points[i * 4 + 1] * height, 4, 0, 2 * Math.PI);
+    ctx.fill();
+  }
+}
+
+// Renders the skeleton from the binary landmark stream instead of the server-drawn MJPEG feed
+export default function SkeletonCanvas({ width = 640, height = 480, thumbnail = true }) {
+  const canvasRef = useRef(null);
+
+  useEffect(() => {
+    const controller = new AbortController();
+    const ctx = canvasRef.current.getContext("2d");
+    let thumbnailImage = null;
+    let points = null;
+    let frameRequested = false;
+
+    const scheduleDraw = () => {
+      if (frameRequested) return;
+      frameRequested = true;
+      requestAnimationFrame(() => {
+        frameRequested = false;
+        drawFrame(ctx, thumbnailImage, points);
+      });
+    };
+
+    const handleMessage = async (type, bytes) => {
+      if (type === MSG_LANDMARKS) {
+        points = decodeLandmarks(new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength), 0);
+      } else if (type === MSG_NO_POSE) {
+        points = null;
+      } else if (type === MSG_THUMBNAIL) {
+        thumbnailImage = await createImageBitmap(new Blob([bytes], { type: "image/jpeg" }));
+      }
+      scheduleDraw();
+    };
+
+    const url = `http://127.0.0.1:5000/landmark_stream${thumbnail ? "?thumbnail=1" : ""}`;
+    (async () => {
+      const response = await fetch(url, { signal: controller.signal });
+      const reader = response.body.getReader();
+      let buffer = new Uint8Array(0);
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        const merged = new Uint8Array(buffer.length + value.length);
+        merged.set(buffer);
+        merged.set(value, buffer.length);
+        buffer = merged;
+
+        // Split complete messages off the front of the buffer
+        let offset = 0;
+        while (buffer.length - offset >= HEADER_BYTES) {
+          const view = new DataView(buffer.buffer, buffer.byteOffset + offset);
+          const type = view.getUint8(0);
+          const length = view.getUint32(1, true);
+          if (buffer.length - offset < HEADER_BYTES + length) break;
+          const start = offset + HEADER_BYTES;
+          await handleMessage(type, buffer.slice(start, start + length));
+          offset = start + length;
+        }
+        buffer = buffer.slice(offset);
+      }
+    })().catch(() => {});
+
+    return () => controller.abort();
+  }, [thumbnail]);
+
+  return (
+    <canvas
+      ref={canvasRef}
+      width={width}
+      height={height}
+      className="w-full h-full"
+      style={{ width: `${width}px`, height: `${height}px` }}
+    />
+  );
+}
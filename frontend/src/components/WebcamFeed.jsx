@@ -1,4 +1,10 @@
+import React, { useState } from "react";
+import SkeletonCanvas from "./SkeletonCanvas";
+
 export default function WebcamFeed({ webcamRef }) {
+  // "video": server-drawn MJPEG feed; "skeleton": landmarks only, drawn here (a few KB/s)
+  const [feedMode, setFeedMode] = useState("video");
+
   return (
     <div className="flex justify-center mt-8 px-4">
       <div className="relative group">
@@ -20,6 +26,12 @@ export default function WebcamFeed({ webcamRef }) {
                 <div className="w-2 h-2 rounded-full bg-blue-500 animate-pulse shadow-lg shadow-blue-500/50" />
                 <span className="text-xs font-medium text-blue-400/80">LIVE FEED</span>
               </div>
+              <button
+                onClick={() => setFeedMode(feedMode === "video" ? "skeleton" : "video")}
+                className="text-xs font-medium text-blue-400/80 border border-blue-800/50 rounded px-2 py-0.5 hover:bg-blue-900/30"
+              >
+                {feedMode === "video" ? "SKELETON ONLY" : "FULL VIDEO"}
+              </button>
               <div className="flex gap-1">
                 <div className="w-1 h-3 bg-blue-600/60 rounded-full" />
                 <div className="w-1 h-4 bg-blue-600/70 rounded-full" />
@@ -30,46 +42,50 @@ export default function WebcamFeed({ webcamRef }) {
 
           {/* Video feed */}
           <div className="relative overflow-hidden rounded-xl">
-            <img 
-              src="http://127.0.0.1:5000/video_feed" 
-              alt="Live Camera Feed"
-              className="w-full h-full object-cover"
-              style={{ width: '640px', height: '480px' }}
-              onLoad={() => {
-                // #region agent log
-                fetch("http://127.0.0.1:7242/ingest/2d2e2322-6b16-4dfb-8b99-4241ef6c281d", {
-                  method: "POST",
-                  headers: { "Content-Type": "application/json" },
-                  body: JSON.stringify({
-                    sessionId: "debug-session",
-                    runId: "pre-fix",
-                    hypothesisId: "G",
-                    location: "WebcamFeed.jsx:9",
-                    message: "video_feed load success",
-                    data: {},
-                    timestamp: Date.now(),
-                  }),
-                }).catch(() => {});
-                // #endregion agent log
-              }}
-              onError={(err) => {
-                // #region agent log
-                fetch("http://127.0.0.1:7242/ingest/2d2e2322-6b16-4dfb-8b99-4241ef6c281d", {
-                  method: "POST",
-                  headers: { "Content-Type": "application/json" },
-                  body: JSON.stringify({
-                    sessionId: "debug-session",
-                    runId: "pre-fix",
-                    hypothesisId: "G",
-                    location: "WebcamFeed.jsx:18",
-                    message: "video_feed load error",
-                    data: { error: (err && err.type) || "unknown" },
-                    timestamp: Date.now(),
-                  }),
-                }).catch(() => {});
-                // #endregion agent log
-              }}
-            />
+            {feedMode === "skeleton" ? (
+              <SkeletonCanvas width={640} height={480} />
+            ) : (
+              <img 
+                src="http://127.0.0.1:5000/video_feed" 
+                alt="Live Camera Feed"
+                className="w-full h-full object-cover"
+                style={{ width: '640px', height: '480px' }}
+                onLoad={() => {
+                  // #region agent log
+                  fetch("http://127.0.0.1:7242/ingest/2d2e2322-6b16-4dfb-8b99-4241ef6c281d", {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({
+                      sessionId: "debug-session",
+                      runId: "pre-fix",
+                      hypothesisId: "G",
+                      location: "WebcamFeed.jsx:9",
+                      message: "video_feed load success",
+                      data: {},
+                      timestamp: Date.now(),
+                    }),
+                  }).catch(() => {});
+                  // #endregion agent log
+                }}
+                onError={(err) => {
+                  // #region agent log
+                  fetch("http://127.0.0.1:7242/ingest/2d2e2322-6b16-4dfb-8b99-4241ef6c281d", {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({
+                      sessionId: "debug-session",
+                      runId: "pre-fix",
+                      hypothesisId: "G",
+                      location: "WebcamFeed.jsx:18",
+                      message: "video_feed load error",
+                      data: { error: (err && err.type) || "unknown" },
+                      timestamp: Date.now(),
+                    }),
+                  }).catch(() => {});
+                  // #endregion agent log
+                }}
+              />
+            )}
             
             {/* Scanline effect overlay */}
             <div className="absolute inset-0 pointer-events-none">
@@ -18,21 +18,16 @@ export default function Results() {
     try {
       const [summaryRes, sessionsRes] = await Promise.all([
         fetch("http://127.0.0.1:5000/get_summary"),
-        fetch("http://127.0.0.1:5000/get_sessions")
+        fetch("http://127.0.0.1:5000/get_sessions?limit=50")
       ]);
       
       const summaryData = await summaryRes.json();
       const sessionsData = await sessionsRes.json();
       
-      const sess = sessionsData.sessions || [];
-      setSessions(sess);
+      setSessions(sessionsData.sessions || []);
 
-      // compute a derived, up-to-date summary from sessions for more accurate UI
-      const derived = computeSummaryFromSessions(sess);
-
-      // merge backend summary with derived, preferring derived totals
-      const merged = Object.assign({}, summaryData || {}, derived);
-      setSummary(merged);
+      // The backend aggregates over the full history; the session list is only the latest page
+      setSummary(summaryData);
       setLoading(false);
     } catch (err) {
       console.error("Error fetching results:", err);
@@ -40,61 +35,6 @@ export default function Results() {
     }
   };
 
-  // derive summary values from sessions array to ensure accuracy
-  const computeSummaryFromSessions = (sessionsArr) => {
-    const summaryOut = {
-      total_sessions: 0,
-      total_reps: 0,
-      average_reps: 0,
-      active_sessions: 0,
-      current_session: null,
-      by_exercise: {},
-      by_mode: {}
-    };
-
-    if (!Array.isArray(sessionsArr) || sessionsArr.length === 0) return summaryOut;
-
-    summaryOut.total_sessions = sessionsArr.length;
-    summaryOut.total_reps = sessionsArr.reduce((acc, s) => acc + (s.total_reps || 0), 0);
-    summaryOut.average_reps = summaryOut.total_sessions ? summaryOut.total_reps / summaryOut.total_sessions : 0;
-    summaryOut.active_sessions = sessionsArr.filter(s => s.is_active).length;
-    summaryOut.current_session = sessionsArr.find(s => s.is_active) || null;
-
-    sessionsArr.forEach(s => {
-      const mode = s.mode || "Unknown";
-
-      // by_mode aggregation
-      if (!summaryOut.by_mode[mode]) summaryOut.by_mode[mode] = { total_reps: 0, sessions: 0 };
-      summaryOut.by_mode[mode].total_reps += (s.total_reps || 0);
-      summaryOut.by_mode[mode].sessions += 1;
-
-      // by_exercise aggregation (use mode as exercise key as well)
-      if (!summaryOut.by_exercise[mode]) summaryOut.by_exercise[mode] = { total_reps: 0, good_posture: 0, bad_posture: 0 };
-      summaryOut.by_exercise[mode].total_reps += (s.total_reps || 0);
-
-      // accumulate posture counts if available
-      // pushup fields
-      if (s.pushup_good_posture) summaryOut.by_exercise[mode].good_posture += s.pushup_good_posture;
-      if (s.pushup_bad_posture) summaryOut.by_exercise[mode].bad_posture += s.pushup_bad_posture;
-
-      // curl fields
-      if (s.curl_r_good_posture) summaryOut.by_exercise[mode].good_posture += s.curl_r_good_posture;
-      if (s.curl_l_good_posture) summaryOut.by_exercise[mode].good_posture += s.curl_l_good_posture;
-      if (s.curl_r_bad_posture) summaryOut.by_exercise[mode].bad_posture += s.curl_r_bad_posture;
-      if (s.curl_l_bad_posture) summaryOut.by_exercise[mode].bad_posture += s.curl_l_bad_posture;
-
-      // squat fields
-      if (s.squat_good_posture) summaryOut.by_exercise[mode].good_posture += s.squat_good_posture;
-      if (s.squat_bad_posture) summaryOut.by_exercise[mode].bad_posture += s.squat_bad_posture;
-
-      // plank fields (time-based)
-      if (s.plank_good_posture_time) summaryOut.by_exercise[mode].good_posture += s.plank_good_posture_time;
-      if (s.plank_bad_posture_time) summaryOut.by_exercise[mode].bad_posture += s.plank_bad_posture_time;
-    });
-
-    return summaryOut;
-  };
-
   const formatDate = (dateString) => {
     if (!dateString) return "Active";
     const date = new Date(dateString);
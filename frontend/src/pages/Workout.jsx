@@ -26,87 +26,88 @@ export default function Workout() {
     };
   }, []);
 
-  // Fetch pose data
+  // Live pose data: a full snapshot, then only the fields that changed
   useEffect(() => {
-    const interval = setInterval(() => {
-      fetch("http://127.0.0.1:5000/pose_data")
-        .then((res) => res.json())
-        .then((data) => {
-          setPoseData(data);
-
-          // Angle updates
-          if (data.mode === "Squat" && data.knee_angle !== undefined) {
-            setAngles({ elbow: data.knee_angle });
-          } else if (data.mode === "Plank" && data.plank_time !== undefined) {
-            setAngles({ elbow: data.plank_time });
-          } else if (data.elbow_angle !== undefined) {
-            setAngles({ elbow: data.elbow_angle });
-          }
-
-          // Mode-based reps & feedback
-          if (data.mode === "Push-Up") {
-            setReps(data.pushup_count || 0);
-            setFeedback(
-              data.pushup_stage === "down"
-                ? "Go lower"
-                : data.pushup_stage === "up"
-                ? "Push up"
-                : "Good posture"
-            );
-          } 
-          
-          else if (data.mode === "Curl") {
-            const total =
-              (data.curl_count_r || 0) + (data.curl_count_l || 0);
-            setReps(total);
-
-            const right =
-              data.curl_stage_r === "up"
-                ? "Curl"
-                : data.curl_stage_r === "down"
-                ? "Slow down"
-                : "Good posture";
-
-            const left =
-              data.curl_stage_l === "up"
-                ? "Curl"
-                : data.curl_stage_l === "down"
-                ? "Slow down"
-                : "Good posture";
-
-            if (right === left) {
-              setFeedback(right);
-            } else {
-              setFeedback(`${right} / ${left}`);
-            }
-          } 
-          
-          else if (data.mode === "Squat") {
-            setReps(data.squat_count || 0);
-            setFeedback(
-              data.squat_stage === "down"
-                ? "Go lower"
-                : data.squat_stage === "up"
-                ? "Stand up"
-                : "Good posture"
-            );
-          } 
-          
-          else if (data.mode === "Plank") {
-            setReps(data.plank_time || 0);
-            setFeedback(
-              data.plank_time > 0
-                ? `Hold steady (${data.plank_time}s)`
-                : "Start plank position"
-            );
-          }
-        })
-        .catch(() => {
-          setFeedback("Connecting to backend...");
-        });
-    }, 500);
-
-    return () => clearInterval(interval);
+    let data = {};
+    const source = new EventSource("http://127.0.0.1:5000/pose_stream");
+
+    source.onmessage = (event) => {
+      data = { ...data, ...JSON.parse(event.data) };
+      setPoseData(data);
+
+      // Angle updates
+      if (data.mode === "Squat" && data.knee_angle !== undefined) {
+        setAngles({ elbow: data.knee_angle });
+      } else if (data.mode === "Plank" && data.plank_time !== undefined) {
+        setAngles({ elbow: data.plank_time });
+      } else if (data.elbow_angle !== undefined) {
+        setAngles({ elbow: data.elbow_angle });
+      }
+
+      // Mode-based reps & feedback
+      if (data.mode === "Push-Up") {
+        setReps(data.pushup_count || 0);
+        setFeedback(
+          data.pushup_stage === "down"
+            ? "Go lower"
+            : data.pushup_stage === "up"
+            ? "Push up"
+            : "Good posture"
+        );
+      } 
+      
+      else if (data.mode === "Curl") {
+        const total =
+          (data.curl_count_r || 0) + (data.curl_count_l || 0);
+        setReps(total);
+
+        const right =
+          data.curl_stage_r === "up"
+            ? "Curl"
+            : data.curl_stage_r === "down"
+            ? "Slow down"
+            : "Good posture";
+
+        const left =
+          data.curl_stage_l === "up"
+            ? "Curl"
+            : data.curl_stage_l === "down"
+            ? "Slow down"
+            : "Good posture";
+
+        if (right === left) {
+          setFeedback(right);
+        } else {
+          setFeedback(`${right} / ${left}`);
+        }
+      } 
+      
+      else if (data.mode === "Squat") {
+        setReps(data.squat_count || 0);
+        setFeedback(
+          data.squat_stage === "down"
+            ? "Go lower"
+            : data.squat_stage === "up"
+            ? "Stand up"
+            : "Good posture"
+        );
+      } 
+      
+      else if (data.mode === "Plank") {
+        setReps(data.plank_time || 0);
+        setFeedback(
+          data.plank_time > 0
+            ? `Hold steady (${data.plank_time}s)`
+            : "Start plank position"
+        );
+      }
+    };
+
+    source.onerror = () => {
+      setFeedback("Connecting to backend...");
+    };
+
+    return () => source.close();
   }, []);
 
   // Update backend mode
@@ -0,0 +1,126 @@
+# governor.py
+import threading
+import time
+
+# Operating points from best quality to cheapest: (model_complexity, inference stride)
+OPERATING_POINTS = ((2, 1), (1, 1), (0, 1), (0, 2), (0, 3), (0, 4))
+LATENCY_EMA_ALPHA = 0.1
+MIN_FRAMES_BETWEEN_CHANGES = 30  # Inferred frames to settle before re-evaluating
+STEP_UP_HEADROOM = 0.7  # Only move to a costlier point if it fits in 70% of the budget
+MEASUREMENT_TTL = 60.0  # Seconds before a past measurement is retried rather than trusted
+
+
+class InferenceGovernor:
+    """Picks model complexity and inference stride to keep up with a target FPS.
+
+    Every inferred frame reports its latency; an EMA of that latency is
+    compared with the budget of the current point (stride / target_fps). Over
+    budget steps to the next cheaper point, comfortably under budget steps back
+    towards full quality. Skipped frames reuse the last inference results.
+    """
+
+    def __init__(self, make_pose, target_fps=15.0, max_complexity=2, adaptive=True):
+        self.make_pose = make_pose
+        self.target_fps = target_fps
+        self.adaptive = adaptive
+        self.points = [p for p in OPERATING_POINTS if p[0] <= max_complexity]
+        if not adaptive:
+            self.points = self.points[:1]
+        self.level = 0
+        self.latency = None  # EMA of inference seconds at the current point
+        self.measured = {}  # level -> (latency EMA, monotonic time) last seen there
+        self.last_results = None
+        self.frames_seen = 0
+        self.frames_inferred = 0
+        self.frames_detected = 0  # Inferred frames where a person was found
+        self._frames_at_level = 0
+        self._poses = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model_complexity(self):
+        return self.points[self.level][0]
+
+    @property
+    def stride(self):
+        return self.points[self.level][1]
+
+    @property
+    def pose(self):
+        """Pose graph for the current complexity, built on first use"""
+        complexity = self.model_complexity
+        pose = self._poses.get(complexity)
+        if pose is None:
+            pose = self._poses[complexity] = self.make_pose(complexity)
+        return pose
+
+    def warm_up(self, image_rgb):
+        """Build the current Pose graph and run it once, untimed, so the first real frame isn't a model load"""
+        self.pose.process(image_rgb)
+
+    def should_infer(self):
+        """True when the current frame should go through pose inference"""
+        self.frames_seen += 1
+        return self.last_results is None or self.frames_seen % self.stride == 0
+
+    def process(self, image_rgb):
+        """Run inference on image_rgb, time it and adapt the operating point"""
+        pose = self.pose
+        started = time.perf_counter()
+        results = pose.process(image_rgb)
+        self.record(time.perf_counter() - started)
+        if results.pose_landmarks:
+            self.frames_detected += 1
+        self.last_results = results
+        return results
+
+    def record(self, latency):
+        with self._lock:
+            self.frames_inferred += 1
+            self._frames_at_level += 1
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += LATENCY_EMA_ALPHA * (latency - self.latency)
+            if self.adaptive and self._frames_at_level >= MIN_FRAMES_BETWEEN_CHANGES:
+                self._adapt()
+
+    def _budget(self, level):
+        return self.points[level][1] / self.target_fps
+
+    def _estimate(self, level):
+        """Expected per-inference latency at another operating point"""
+        if self.points[level][0] == self.model_complexity:
+            return self.latency  # Only the stride differs
+        latency, measured_at = self.measured.get(level, (None, 0.0))
+        if latency is None or time.monotonic() - measured_at > MEASUREMENT_TTL:
+            return self.latency * 2  # Unknown or stale: assume one complexity step doubles cost
+        return latency
+
+    def _adapt(self):
+        self.measured[self.level] = (self.latency, time.monotonic())
+        if self.latency > self._budget(self.level) and self.level < len(self.points) - 1:
+            self._set_level(self.level + 1)
+        elif self.level > 0 and self._estimate(self.level - 1) < self._budget(self.level - 1) * STEP_UP_HEADROOM:
+            self._set_level(self.level - 1)
+
+    def _set_level(self, level):
+        if self.points[level][0] != self.model_complexity:
+            self.latency = None  # Re-measure on the new model
+        self.level = level
+        self._frames_at_level = 0
+
+    def status(self):
+        """Current operating point, for the /governor endpoint"""
+        latency = self.latency
+        return {
+            "adaptive": self.adaptive,
+            "target_fps": self.target_fps,
+            "model_complexity": self.model_complexity,
+            "stride": self.stride,
+            "latency_ms": round(latency * 1000, 1) if latency else None,
+            "max_inference_fps": round(1 / latency, 1) if latency else None,
+            "frames_seen": self.frames_seen,
+            "frames_inferred": self.frames_inferred,
+            "frames_detected": self.frames_detected,
+        }
@@ -0,0 +1,131 @@
+# metrics.py
+"""Latency histograms and Prometheus text exposition for /metrics.
+
+Hot-path instrumentation is limited to wrapping a stage callable with timed();
+an observation is one bisect and three increments under a lock. Everything
+else (frame and drop counters, stream counts) is read from the pipeline's
+existing stats when /metrics is scraped. With metrics disabled nothing is
+wrapped, so the frame loop runs exactly the uninstrumented code.
+"""
+import bisect
+import threading
+import time
+
+# Upper bounds in seconds, from sub-millisecond encodes to multi-second stalls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.035, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram for one label set"""
+
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class HistogramFamily:
+    """Histograms sharing a name, one per combination of label values"""
+
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        bounds = [format_value(b) for b in self.buckets] + ["+Inf"]
+        for values, child in sorted(tuple(self._children.items())):
+            counts, total = child.snapshot()
+            labels = dict(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels(dict(labels, le=bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {cumulative}")
+
+
+def timed(histogram, func):
+    """Wrap func so every call's wall time is observed into histogram"""
+    clock = time.perf_counter
+
+    def wrapper(*args):
+        started = clock()
+        try:
+            return func(*args)
+        finally:
+            histogram.observe(clock() - started)
+
+    return wrapper
+
+
+# ------------------ Exposition ------------------
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_family(lines, name, kind, help_text, samples):
+    """Append one counter/gauge family; samples are (labels dict, value) pairs"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+
+class Metrics:
+    """Registry of the stage and HTTP latency histograms"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.stage_seconds = HistogramFamily(
+            "pose_stage_seconds",
+            "Time spent in each frame pipeline stage per frame (inference: only frames that ran the pose model).",
+            ("station", "stage"))
+        self.request_seconds = HistogramFamily(
+            "pose_http_request_seconds",
+            "Time to handle each HTTP endpoint (for streams, until the response starts).", ("endpoint",))
+
+    def render(self, families=()):
+        """Prometheus text format: the histograms plus (name, kind, help, samples) families"""
+        lines = []
+        self.stage_seconds.render(lines)
+        self.request_seconds.render(lines)
+        for name, kind, help_text, samples in families:
+            render_family(lines, name, kind, help_text, samples)
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,332 @@
+# multiperson.py
+"""Multi-person tracking for group classes.
+
+MediaPipe Pose follows one person, so this runs one Pose graph per person on
+a crop around them:
+
+- Detection: every `detect_every` frames a static-image Pose pass looks for
+  people on the frame with every tracked person blacked out, repeating until
+  nobody new is found, so each pass adds one more person. Detection runs on
+  its own background thread, never on the inference workers a frame waits
+  for, and its boxes are merged in when ready.
+- Tracking: between detections each track's box follows its own landmarks
+  (the RoiTracker logic), which costs nothing beyond the pose pass itself.
+- Inference: tracks are inferred in parallel on a fixed worker pool. When
+  there are more people than fit the frame budget, the stalest tracks go
+  first and the rest keep their last state, so each person's update rate
+  drops smoothly instead of the whole pipeline stalling.
+
+Every track has its own WorkoutAnalyzer, so reps and posture are counted
+per person.
+"""
+import collections
+import concurrent.futures
+import itertools
+import os
+import threading
+import time
+
+import cv2
+
+from analyzer import WorkoutAnalyzer
+from roi import RoiTracker
+
+MAX_PEOPLE = 4
+DETECT_EVERY = 15  # Frames between detection passes
+MAX_TRACK_MISSES = 10  # Inferences without landmarks before a track is dropped
+DUPLICATE_IOU = 0.5  # Boxes overlapping this much are taken to be the same person
+DETECTION_MARGIN = 0.15  # Padding around a newly detected person's landmark box
+LATENCY_EMA_ALPHA = 0.2
+
+
+class MultiPoseResults(collections.namedtuple("MultiPoseResults", "pose_landmarks people")):
+    """Pose results for a whole frame.
+
+    pose_landmarks is the primary (longest-tracked) person's landmarks, for
+    code written against a single-person result; people holds
+    (track id, box, landmarks) for everyone currently tracked.
+    """
+
+    __slots__ = ()
+
+
+def landmark_box(landmarks, width, height, margin=DETECTION_MARGIN):
+    """Padded pixel box (x0, y0, x1, y1) around normalized landmarks, or None if degenerate"""
+    xs = [lm.x * width for lm in landmarks]
+    ys = [lm.y * height for lm in landmarks]
+    pad_x = (max(xs) - min(xs)) * margin
+    pad_y = (max(ys) - min(ys)) * margin
+    x0, y0 = max(0, int(min(xs) - pad_x)), max(0, int(min(ys) - pad_y))
+    x1, y1 = min(width, int(max(xs) + pad_x)), min(height, int(max(ys) + pad_y))
+    if x1 - x0 < 16 or y1 - y0 < 16:
+        return None
+    return x0, y0, x1, y1
+
+
+def box_iou(a, b):
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+class TrackRoi(RoiTracker):
+    """RoiTracker that never falls back to a full-frame pass.
+
+    A full-frame pass would lock onto whoever is most prominent, so a track
+    that loses its person keeps searching its last box until it is dropped.
+    """
+
+    def update(self, results, box, frame_shape):
+        previous = self.box
+        super().update(results, box, frame_shape)
+        if self.box is None:
+            self.box = previous
+
+
+class PersonTrack:
+    """One tracked person: box, Pose graph, latest landmarks and counters"""
+
+    __slots__ = ("id", "roi", "pose", "analyzer", "landmarks", "misses", "last_inferred")
+
+    def __init__(self, track_id, box, analyzer):
+        self.id = track_id
+        self.roi = TrackRoi()
+        self.roi.box = box
+        self.pose = None  # Taken from the tracker's pool on first inference
+        self.analyzer = analyzer
+        self.landmarks = None  # Full-frame NormalizedLandmarkList from the last successful inference
+        self.misses = 0
+        self.last_inferred = -1  # Frame number
+
+
+class MultiPersonTracker:
+    """Detects, tracks and runs pose estimation for up to max_people people.
+
+    make_pose(complexity) builds a tracking-mode Pose graph for one person;
+    make_detector() builds the static-image Pose used to find new people.
+    """
+
+    def __init__(self, make_pose, make_detector, model_complexity=1, max_people=MAX_PEOPLE,
+                 detect_every=DETECT_EVERY, workers=None, target_fps=15.0, thresholds=None, smoothing=None):
+        self.make_pose = make_pose
+        self.make_detector = make_detector
+        self.model_complexity = model_complexity
+        self.max_people = max_people
+        self.detect_every = detect_every
+        self.workers = workers or os.cpu_count() or 1
+        self.target_fps = target_fps
+        self.thresholds = thresholds
+        self.smoothing = smoothing
+        self.tracks = {}  # id -> PersonTrack, only touched by the frame loop
+        self.latency = None  # EMA of one person's inference seconds
+        self.frames = 0
+        self.frames_detected = 0  # Frames with at least one person's landmarks
+        self.person_inferences = 0
+        self.detections = 0
+        self._ids = itertools.count(1)
+        self._pool = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="person-pose")
+        self._detect_pool = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="person-detect")
+        self._detector = None  # Built by warm_up() or the first detection pass
+        self._detection = None  # Future of the running detection pass
+        self._idle_poses = []  # Pose graphs of dropped tracks, reset and ready for reuse
+        self._pose_lock = threading.Lock()
+
+    # ------------------ Frames ------------------
+    def process(self, img, timestamp, mode, landmark_buffer):
+        """Track everyone in one BGR frame and step each person's analyzer; returns MultiPoseResults"""
+        self.frames += 1
+        self._merge_detections()
+        if self._detection is None and len(self.tracks) < self.max_people and (
+                not self.tracks or self.frames % self.detect_every == 0):
+            boxes = [track.roi.box for track in self.tracks.values()]
+            # Copy: the frame is drawn on after this call, while detection may still be running
+            self._detection = self._detect_pool.submit(self._detect, img.copy(), boxes)
+
+        due = self._due_tracks()
+        if due:
+            futures = [self._pool.submit(self._infer, track, img) for track in due]
+            latencies = [future.result() for future in futures]
+            self.person_inferences += len(due)
+            # Workers run in parallel, so a frame costs about latency * ceil(len(due) / workers)
+            latency = sum(latencies) / len(latencies)
+            self.latency = latency if self.latency is None else (
+                self.latency + LATENCY_EMA_ALPHA * (latency - self.latency))
+
+        for track in due:
+            if track.misses >= MAX_TRACK_MISSES:
+                self._drop(track)
+            elif track.misses == 0:
+                track.analyzer.update(landmark_buffer.fill(track.landmarks), mode, timestamp)
+        results = self.results()
+        if results.people:
+            self.frames_detected += 1
+        return results
+
+    def _due_tracks(self):
+        """Tracks to infer this frame: all of them while they fit the budget, else the stalest"""
+        tracks = sorted(self.tracks.values(), key=lambda track: track.last_inferred)
+        capacity = self.capacity()
+        if capacity is not None:
+            tracks = tracks[:capacity]
+        for track in tracks:
+            track.last_inferred = self.frames
+        return tracks
+
+    def capacity(self):
+        """People that can be inferred per frame within 1 / target_fps, or None before measuring.
+
+        The workers run in parallel, so one round of `workers` people costs
+        about one inference latency. Never below one, so every frame makes
+        progress on the stalest person.
+        """
+        if not self.latency:
+            return None
+        return max(1, int(self.workers / (self.latency * self.target_fps)))
+
+    def _infer(self, track, img):
+        """Pool worker: run one track's Pose on its crop; returns the inference seconds"""
+        if track.pose is None:
+            track.pose = self._acquire_pose()
+        region, box = track.roi.crop(img)
+        started = time.perf_counter()
+        results = track.pose.process(cv2.cvtColor(region, cv2.COLOR_BGR2RGB))
+        latency = time.perf_counter() - started
+        track.roi.update(results, box, img.shape)
+        if results.pose_landmarks:
+            track.landmarks = results.pose_landmarks
+            track.misses = 0
+        else:
+            track.misses += 1
+        return latency
+
+    # ------------------ Detection ------------------
+    def _detect(self, masked, boxes):
+        """Detection thread: boxes of people not covered by `boxes`, one static Pose pass each.
+
+        masked is a private copy of the frame; found people are blacked out in it.
+        """
+        if self._detector is None:
+            self._detector = self.make_detector()
+        h, w = masked.shape[:2]
+        for x0, y0, x1, y1 in boxes:
+            masked[y0:y1, x0:x1] = 0
+        found = []
+        for _ in range(self.max_people - len(boxes)):
+            results = self._detector.process(cv2.cvtColor(masked, cv2.COLOR_BGR2RGB))
+            if not results.pose_landmarks:
+                break
+            box = landmark_box(results.pose_landmarks.landmark, w, h)
+            if box is None:
+                break
+            # Overlapping a known box means masking missed part of that person; mask more and go on
+            if all(box_iou(box, other) < DUPLICATE_IOU for other in found + boxes):
+                found.append(box)
+            x0, y0, x1, y1 = box
+            masked[y0:y1, x0:x1] = 0
+        return found
+
+    def _merge_detections(self):
+        """Start tracks for finished detections and retire tracks that converged on one person"""
+        if self._detection is None or not self._detection.done():
+            return
+        found, self._detection = self._detection.result(), None
+        self.detections += 1
+        for box in found:
+            if len(self.tracks) >= self.max_people:
+                break
+            if all(box_iou(box, track.roi.box) < DUPLICATE_IOU for track in self.tracks.values()):
+                track = PersonTrack(next(self._ids), box, WorkoutAnalyzer(self.thresholds, self.smoothing))
+                self.tracks[track.id] = track
+        tracks = sorted(self.tracks.values(), key=lambda track: track.id)
+        for i, older in enumerate(tracks):
+            if older.id not in self.tracks:
+                continue
+            for newer in tracks[i + 1:]:
+                if newer.id in self.tracks and box_iou(older.roi.box, newer.roi.box) >= DUPLICATE_IOU:
+                    self._drop(newer)  # Two tracks ended up following the same person
+
+    def warm_up(self, image_rgb):
+        """Build the detector and one tracking Pose graph and run each once on image_rgb"""
+        if self._detector is None:
+            self._detector = self.make_detector()
+        self._detector.process(image_rgb)
+        pose = self._acquire_pose()
+        pose.process(image_rgb)
+        with self._pose_lock:
+            self._idle_poses.append(pose)
+
+    # ------------------ Tracks ------------------
+    def _acquire_pose(self):
+        with self._pose_lock:
+            if self._idle_poses:
+                return self._idle_poses.pop()
+        return self.make_pose(self.model_complexity)
+
+    def _drop(self, track):
+        del self.tracks[track.id]
+        if track.pose is not None:
+            track.pose.reset()  # Forget the previous person before another track reuses it
+            with self._pose_lock:
+                self._idle_poses.append(track.pose)
+
+    def primary(self):
+        """The longest-tracked person currently seen, or None"""
+        tracks = [track for track in self.tracks.values() if track.landmarks is not None]
+        return min(tracks, key=lambda track: track.id) if tracks else None
+
+    def people(self):
+        """(track id, box, track) for every person seen so far, by track id"""
+        return [(track.id, track.roi.box, track) for track in sorted(self.tracks.values(), key=lambda t: t.id)
+                if track.landmarks is not None]
+
+    def results(self):
+        primary = self.primary()
+        people = tuple((track_id, box, track.landmarks) for track_id, box, track in self.people())
+        return MultiPoseResults(primary.landmarks if primary else None, people)
+
+    def reset_counters(self):
+        for track in self.tracks.values():
+            track.analyzer.reset_counters()
+
+    @property
+    def frames_inferred(self):
+        return self.frames  # Every frame goes through detection and/or per-person inference
+
+    def operating_point(self):
+        """The same fields as InferenceGovernor.status(), for /governor in multi-person mode"""
+        latency = self.latency
+        return {
+            "adaptive": False,
+            "target_fps": self.target_fps,
+            "model_complexity": self.model_complexity,
+            "stride": 1,
+            "latency_ms": round(latency * 1000, 1) if latency else None,
+            "max_inference_fps": round(1 / latency, 1) if latency else None,
+            "frames_seen": self.frames,
+            "frames_inferred": self.frames_inferred,
+            "frames_detected": self.frames_detected,
+        }
+
+    def status(self):
+        latency = self.latency
+        return {
+            "people": len(self.tracks),
+            "max_people": self.max_people,
+            "workers": self.workers,
+            "detect_every": self.detect_every,
+            "detections": self.detections,
+            "person_inferences": self.person_inferences,
+            "latency_ms": round(latency * 1000, 1) if latency else None,
+            "people_per_frame": self.capacity(),
+        }
+
+    def close(self):
+        self._detect_pool.shutdown(wait=True)
+        self._pool.shutdown(wait=True)
+        for track in tuple(self.tracks.values()):
+            self._drop(track)
+        for pose in self._idle_poses + ([self._detector] if self._detector is not None else []):
+            pose.close()
+        self._idle_poses = []
@@ -0,0 +1,438 @@
+# pipeline.py
+import collections
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+STAGE_ERROR_LOG_EVERY = 100  # Log the first error of a stage, then every Nth, so a stuck stage can't flood the log
+
+
+class SourceEnded(Exception):
+    """Raised by a read_frame callable whose source has no more frames (e.g. a video file at its end)"""
+
+
+# ------------------ Bounded Queue ------------------
+class DropOldestQueue:
+    """Bounded FIFO that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.total = 0
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.total += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None if nothing arrives within timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def get_newest(self):
+        """Return the newest item without waiting, discarding (and counting as dropped) any older ones"""
+        with self._cond:
+            if not self._items:
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+    def qsize(self):
+        return len(self._items)
+
+    def stats(self):
+        return {
+            "queue_depth": len(self._items),
+            "queue_size": self.maxsize,
+            "frames": self.total,
+            "dropped": self.dropped,
+        }
+
+
+# ------------------ Broadcasting ------------------
+class Subscription:
+    """Latest-item slot for one client; unread items are replaced, never queued"""
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+        self.delivered = 0
+        self.skipped = 0
+        self._frame = None
+        self._cond = threading.Condition()
+
+    def offer(self, frame):
+        with self._cond:
+            if self._frame is not None:
+                self.skipped += 1
+            self._frame = frame
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the newest frame, or None if nothing arrives within timeout"""
+        with self._cond:
+            if self._frame is None:
+                self._cond.wait(timeout)
+            frame, self._frame = self._frame, None
+        if frame is not None:
+            self.delivered += 1
+        return frame
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DeltaSubscription(Subscription):
+    """Slot for dict deltas: unread deltas are merged so no change is lost"""
+
+    def offer(self, delta):
+        with self._cond:
+            if self._frame is not None:
+                self.skipped += 1
+                self._frame = dict(self._frame, **delta)
+            else:
+                self._frame = delta
+            self._cond.notify()
+
+
+class FrameBroadcaster:
+    """Fans each published frame out to any number of subscribers.
+
+    Publishing only swaps a reference into every subscriber's slot, so a slow
+    client skips frames instead of holding up the producer or other clients.
+    """
+
+    def __init__(self, subscription_class=Subscription):
+        self.subscription_class = subscription_class
+        self.published = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = self.subscription_class(self)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, frame):
+        with self._lock:
+            subscribers = tuple(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(frame)
+        self.published += 1
+
+    def stats(self):
+        with self._lock:
+            subscribers = tuple(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "frames": self.published,
+            "skipped": sum(s.skipped for s in subscribers),
+        }
+
+
+class StateBroadcaster(FrameBroadcaster):
+    """Publishes only the keys of a state dict that changed since the last publish"""
+
+    def __init__(self):
+        super().__init__(DeltaSubscription)
+        self._last = {}
+        self._state_lock = threading.Lock()
+
+    def publish_state(self, state):
+        """Diff state against the previous one and fan out the changed keys, if any"""
+        with self._state_lock:
+            last = self._last
+            delta = {k: v for k, v in state.items() if k not in last or last[k] != v}
+            self._last = state
+        if delta:
+            self.publish(delta)
+        return delta
+
+
+# ------------------ Inference Scheduling ------------------
+class InferenceScheduler:
+    """Fixed pool of inference workers shared fairly by several pipelines.
+
+    A pipeline with a frame waiting joins a round-robin ready queue; each
+    worker takes the pipeline at the head, runs inference on its newest frame
+    and sends it to the back if more frames are waiting. A pipeline never has
+    more than one inference in flight, so per-camera frame order and Pose
+    graph state are preserved, and no camera can starve the others.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.scheduled = 0
+        self._ready = collections.deque()
+        self._queued = set()  # Pipelines in _ready or currently being processed
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"inference-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, pipeline):
+        """Mark pipeline as having a frame to infer; no-op if already scheduled"""
+        with self._cond:
+            if pipeline in self._queued:
+                return
+            self._queued.add(pipeline)
+            self._ready.append(pipeline)
+            self._cond.notify()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._ready:
+                    self._cond.wait()
+                pipeline = self._ready.popleft()
+            try:
+                pipeline.infer_pending()
+            except Exception:
+                logger.exception("Inference worker failed; continuing")  # Never shrink the shared pool
+            finally:
+                with self._cond:
+                    self.scheduled += 1
+                    if pipeline.capture_queue.qsize() and pipeline.running:
+                        self._ready.append(pipeline)  # Back of the line behind the other cameras
+                        self._cond.notify()
+                    else:
+                        self._queued.discard(pipeline)
+
+    def stats(self):
+        with self._cond:
+            return {"workers": self.workers, "ready": len(self._ready), "scheduled": self.scheduled}
+
+
+# ------------------ Frame Pipeline ------------------
+class FramePipeline:
+    """Capture -> inference -> encode, each stage on its own thread.
+
+    Stages are joined by DropOldestQueue instances so a slow downstream stage
+    never stalls the camera: it simply sees the most recent frames. Inference
+    runs exactly once per frame no matter how many clients are watching.
+    Each output profile (e.g. JPEG quality/size) has its own FrameBroadcaster
+    and is encoded once per frame, only while someone subscribes to it; all
+    of a profile's clients share the same encoded buffer. Broadcasters other
+    than the default are dropped once their last client leaves.
+
+    read_frame()                        -> (success, img), e.g. cap.read
+    process_frame(img, t)               -> results, runs pose inference and exercise logic;
+                                           t is the frame's monotonic capture time
+    encode_frame(img, res, profiles)    -> one encoded frame per requested profile, or None
+                                           to skip publishing that profile this time
+
+    With a shared InferenceScheduler the pipeline has no inference thread of
+    its own; captured frames are handed to the scheduler's worker pool.
+
+    An exception from any stage callable is counted in stats()["<stage>"]["errors"],
+    logged, and costs only that frame; the stage thread keeps running. The one
+    exception is SourceEnded from read_frame, which ends capture for good
+    (stats()["capture"]["ended"]) while already captured frames drain.
+    """
+
+    def __init__(self, read_frame, process_frame, encode_frame, queue_size=2, scheduler=None,
+                 default_profile=None):
+        self.read_frame = read_frame
+        self.process_frame = process_frame
+        self.encode_frame = encode_frame
+        self.scheduler = scheduler
+        self.capture_queue = DropOldestQueue(queue_size)
+        self.encode_queue = DropOldestQueue(queue_size)
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.capture_failures = 0
+        self.source_ended = False
+        self.retired_published = 0  # Frames published by broadcasters since pruned
+        self._outputs_lock = threading.Lock()
+        self.errors = {"capture": 0, "inference": 0, "encode": 0}
+        self.outputs = {}  # profile -> FrameBroadcaster
+        self.output = self.output_for(default_profile)
+
+    def output_for(self, profile):
+        """Broadcaster for one output profile, created on first request"""
+        output = self.outputs.get(profile)
+        if output is None:
+            with self._outputs_lock:
+                output = self.outputs.setdefault(profile, FrameBroadcaster())
+        return output
+
+    def subscribe(self, profile):
+        """Subscription to one profile's frames; atomic with pruning, so it can't land on a dropped broadcaster"""
+        with self._outputs_lock:
+            output = self.outputs.get(profile)
+            if output is None:
+                output = self.outputs[profile] = FrameBroadcaster()
+            return output.subscribe()
+
+    def _prune_outputs(self):
+        """Drop broadcasters (except the default) that no client subscribes to any more"""
+        with self._outputs_lock:
+            for profile, output in tuple(self.outputs.items()):
+                if output is not self.output and not output.subscriber_count():
+                    del self.outputs[profile]
+                    self.retired_published += output.published
+
+    def frames_published(self):
+        """Frames published over all profiles, including pruned ones"""
+        return self.retired_published + sum(output.published for output in tuple(self.outputs.values()))
+
+    @property
+    def running(self):
+        return bool(self._threads) and not self._stop.is_set()
+
+    def start(self):
+        """Start the stage threads once; later calls are no-ops"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            stages = [("capture", self._capture_loop), ("encode", self._encode_loop)]
+            if self.scheduler is None:
+                stages.append(("inference", self._inference_loop))
+            else:
+                self.scheduler.start()
+            for name, target in stages:
+                thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        with self._lock:
+            self._stop.set()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def _stage_error(self, stage):
+        """Count and log an exception raised by one stage's callable; call from an except block"""
+        self.errors[stage] += 1
+        count = self.errors[stage]
+        if count == 1 or count % STAGE_ERROR_LOG_EVERY == 0:
+            logger.exception("Pipeline %s stage failed (%d errors so far)", stage, count)
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            try:
+                success, img = self.read_frame()
+            except SourceEnded:
+                logger.info("Capture source ended; stopping capture")
+                self.source_ended = True
+                return
+            except Exception:
+                self._stage_error("capture")
+                time.sleep(0.005)
+                continue
+            # Skip bad frames so MediaPipe doesn't receive empty packets
+            if not success or img is None or img.size == 0:
+                self.capture_failures += 1
+                time.sleep(0.005)
+                continue
+            self.capture_queue.put((img, time.monotonic()))
+            if self.scheduler is not None:
+                self.scheduler.submit(self)
+
+    def infer_pending(self):
+        """Run inference on the newest queued frame, if any (scheduler workers call this).
+
+        A worker may reach this pipeline only after others had their turn, so
+        older frames are skipped (counted as capture drops) rather than
+        inferred one frame late.
+        """
+        item = self.capture_queue.get_newest()
+        if item is None:
+            return
+        img, timestamp = item
+        try:
+            results = self.process_frame(img, timestamp)
+        except Exception:
+            self._stage_error("inference")
+            return
+        self.encode_queue.put((img, results))
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            item = self.capture_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            img, timestamp = item
+            try:
+                results = self.process_frame(img, timestamp)
+            except Exception:
+                self._stage_error("inference")
+                continue
+            self.encode_queue.put((img, results))
+
+    def _encode_loop(self):
+        while not self._stop.is_set():
+            item = self.encode_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            # Only encode the profiles someone is watching; with no viewers at all,
+            # keep inferring for the counters but skip the encode
+            active = []
+            idle = False
+            for profile, output in tuple(self.outputs.items()):
+                if output.subscriber_count():
+                    active.append((profile, output))
+                elif output is not self.output:
+                    idle = True
+            if idle:
+                self._prune_outputs()
+            if not active:
+                continue
+            img, results = item
+            try:
+                frames = self.encode_frame(img, results, [profile for profile, _ in active])
+            except Exception:
+                self._stage_error("encode")
+                continue
+            for (profile, output), frame in zip(active, frames):
+                if frame is not None:
+                    output.publish(frame)
+
+    def stats(self):
+        """Per-stage queue depth and drop counters (each stage reports its output queue)"""
+        return {
+            "running": self.running,
+            "capture": dict(self.capture_queue.stats(), failures=self.capture_failures,
+                            errors=self.errors["capture"], ended=self.source_ended),
+            "inference": dict(self.encode_queue.stats(), errors=self.errors["inference"]),
+            "encode": dict(self.output.stats(), errors=self.errors["encode"],
+                           profiles={str(profile): output.stats() for profile, output in tuple(self.outputs.items())}),
+        }
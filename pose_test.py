@@ -1,26 +1,9 @@
 import cv2
 import mediapipe as mp
-import math
 import time
-
-# ------------------ Angle Calculation ------------------
-def calculate_angle(a, b, c):
-    """Calculate the angle at point b (in degrees) given points a, b, c"""
-    a = [a.x, a.y]
-    b = [b.x, b.y]
-    c = [c.x, c.y]
-
-    radians = math.atan2(c[1] - b[1], c[0] - b[0]) - math.atan2(a[1] - b[1], a[0] - b[0])
-    angle = abs(radians * 180.0 / math.pi)
-    if angle > 180.0:
-        angle = 360 - angle
-    return angle
-
-# ------------------ Helper Class ------------------
-class Point:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
+from angles import (JOINT_INDEX, LEFT_ELBOW, LEFT_SHOULDER, LEFT_WRIST, RIGHT_ELBOW, RIGHT_SHOULDER, RIGHT_WRIST,
+                    LandmarkBuffer, compute_angles)
+from filters import MovingAverage
 
 # ------------------ Mediapipe Setup ------------------
 mp_pose = mp.solutions.pose
@@ -35,6 +18,10 @@ pose = mp_pose.Pose(static_image_mode=False,
                     min_detection_confidence=0.5,
                     min_tracking_confidence=0.5)
 
+# Joints highlighted on screen, and the buffer every frame's landmarks are copied into
+KEY_JOINTS = (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST)
+landmark_buffer = LandmarkBuffer()
+
 # ------------------ Default Camera ------------------
 cap = cv2.VideoCapture(0)  # default laptop camera
 if not cap.isOpened():
@@ -51,7 +38,7 @@ pushup_stage = None
 PUSHUP_ELBOW_MIN = 70
 PUSHUP_ELBOW_MAX = 160
 ANGLE_HISTORY_WINDOW = 8
-angle_history = []
+angle_filter = MovingAverage(ANGLE_HISTORY_WINDOW)
 
 # ------------------ Dumbbell Curl Settings ------------------
 curl_count_r = 0
@@ -60,8 +47,8 @@ curl_stage_r = None
 curl_stage_l = None
 CURL_ELBOW_MIN = 50
 CURL_ELBOW_MAX = 160
-angle_history_r = []
-angle_history_l = []
+angle_filter_r = MovingAverage(ANGLE_HISTORY_WINDOW)
+angle_filter_l = MovingAverage(ANGLE_HISTORY_WINDOW)
 
 # ------------------ Mode ------------------
 mode = "Push-Up"  # default
@@ -103,47 +90,32 @@ while True:
             print("Landmarks detected (frame {}).".format(frame_idx))
             last_landmark_print = now
 
-        landmarks = results.pose_landmarks.landmark
+        pts = landmark_buffer.fill(results.pose_landmarks)
+        xs = pts[:, 0].tolist()
 
         # --- draw skeleton with visible specs ---
         mp_draw.draw_landmarks(img, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
                                landmark_drawing_spec=landmark_spec,
                                connection_drawing_spec=connection_spec)
 
-        # --- Common joints ---
-        r_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        r_elbow = landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-        r_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value]
-
-        l_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        l_elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        l_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-
         # draw big circles on key joints (explicit so you can see even if draw_landmarks fails visually)
         h, w = img.shape[:2]
-        for p in (r_shoulder, r_elbow, r_wrist, l_shoulder, l_elbow, l_wrist):
-            cx = int(p.x * w)
-            cy = int(p.y * h)
+        for cx, cy in (pts[KEY_JOINTS, :2] * (w, h)).astype(int).tolist():
             cv2.circle(img, (cx, cy), 6, (0, 255, 255), -1)  # yellow filled
 
-        # --- Calculate elbow angles ---
-        r_angle = calculate_angle(r_shoulder, r_elbow, r_wrist)
-        l_angle = calculate_angle(l_shoulder, l_elbow, l_wrist)
+        # --- Calculate all joint angles in one vectorized call ---
+        angles = compute_angles(pts).tolist()
+        r_angle = angles[JOINT_INDEX["r_elbow"]]
+        l_angle = angles[JOINT_INDEX["l_elbow"]]
 
         # --- Push-Up Mode ---
         if mode == "Push-Up":
-            r_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-            l_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-            mid_hip = Point((r_hip.x + l_hip.x) / 2, (r_hip.y + l_hip.y) / 2)
-            spine_angle = calculate_angle(r_shoulder, mid_hip, l_shoulder)
+            spine_angle = angles[JOINT_INDEX["spine"]]
 
             elbow_angle = (r_angle + l_angle) / 2
 
             # Smooth elbow angle
-            angle_history.append(elbow_angle)
-            if len(angle_history) > ANGLE_HISTORY_WINDOW:
-                angle_history.pop(0)
-            smoothed_angle = sum(angle_history) / len(angle_history)
+            smoothed_angle = angle_filter.update(elbow_angle)
 
             # Stage detection
             if smoothed_angle <= PUSHUP_ELBOW_MIN and spine_angle > 150:
@@ -168,22 +140,16 @@ while True:
 
         # --- Dumbbell Curl Mode ---
         elif mode == "Curl":
-            torso_x = (l_shoulder.x + r_shoulder.x) / 2
+            torso_x = (xs[LEFT_SHOULDER] + xs[RIGHT_SHOULDER]) / 2
 
             # Smooth right elbow
-            angle_history_r.append(r_angle)
-            if len(angle_history_r) > ANGLE_HISTORY_WINDOW:
-                angle_history_r.pop(0)
-            smoothed_r = sum(angle_history_r) / len(angle_history_r)
+            smoothed_r = angle_filter_r.update(r_angle)
 
             # Smooth left elbow
-            angle_history_l.append(l_angle)
-            if len(angle_history_l) > ANGLE_HISTORY_WINDOW:
-                angle_history_l.pop(0)
-            smoothed_l = sum(angle_history_l) / len(angle_history_l)
+            smoothed_l = angle_filter_l.update(l_angle)
 
             # Right Arm Stage
-            if smoothed_r <= CURL_ELBOW_MIN and abs(r_elbow.x - torso_x) < 0.12:
+            if smoothed_r <= CURL_ELBOW_MIN and abs(xs[RIGHT_ELBOW] - torso_x) < 0.12:
                 curl_stage_r = "up"
                 feedback_r = "Curl up!"
             elif smoothed_r >= CURL_ELBOW_MAX and curl_stage_r == "up":
@@ -194,7 +160,7 @@ while True:
                 feedback_r = "Good posture"
 
             # Left Arm Stage
-            if smoothed_l <= CURL_ELBOW_MIN and abs(l_elbow.x - torso_x) < 0.12:
+            if smoothed_l <= CURL_ELBOW_MIN and abs(xs[LEFT_ELBOW] - torso_x) < 0.12:
                 curl_stage_l = "up"
                 feedback_l = "Curl up!"
             elif smoothed_l >= CURL_ELBOW_MAX and curl_stage_l == "up":
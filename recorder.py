@@ -0,0 +1,99 @@
+# recorder.py
+"""Per-session landmark recordings stored as memory-mappable column files.
+
+A recording is a directory holding:
+    timestamps.npy   (capacity,) float64, monotonic frame capture time in seconds
+    landmarks.npy    (capacity, 33, 4) float32 (or float16), x, y, z, visibility
+    meta.json        {"frames": n, "dtype": ..., plus caller metadata}
+
+float32 keeps the landmarks exactly as the live analyzer saw them, so a
+replay counts the same reps. float16 halves the file size, but rounding can
+move an angle across a threshold and change the count; it is opt-in.
+
+Only the first meta["frames"] rows are valid; the rest is preallocated
+space. Use load_recording() to get read-only memmaps trimmed to that length.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from angles import NUM_LANDMARKS
+
+LANDMARK_CHANNELS = 4  # x, y, z, visibility
+DEFAULT_CAPACITY = 18000  # 10 minutes at 30 FPS; doubled on demand
+META_FLUSH_EVERY = 300  # Frames between meta.json updates, bounds loss on a crash
+
+
+class LandmarkRecorder:
+    """Appends one frame of landmarks plus a timestamp per call to a preallocated file"""
+
+    def __init__(self, path, dtype=np.float32, capacity=DEFAULT_CAPACITY, **meta):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.frames = 0
+        self.meta = dict(meta, dtype=self.dtype.name)
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._timestamps, self._landmarks = self._allocate(capacity)
+        self._write_meta()
+
+    @property
+    def capacity(self):
+        return len(self._timestamps)
+
+    def _allocate(self, capacity):
+        timestamps = np.lib.format.open_memmap(
+            os.path.join(self.path, "timestamps.npy"), mode="w+",
+            dtype=np.float64, shape=(capacity,))
+        landmarks = np.lib.format.open_memmap(
+            os.path.join(self.path, "landmarks.npy"), mode="w+",
+            dtype=self.dtype, shape=(capacity, NUM_LANDMARKS, LANDMARK_CHANNELS))
+        return timestamps, landmarks
+
+    def _grow(self):
+        capacity = max(self.capacity * 2, 1)
+        old_timestamps = np.array(self._timestamps[:self.frames])
+        old_landmarks = np.array(self._landmarks[:self.frames])
+        # Release the old mappings before the files are recreated at the new size
+        self._timestamps = self._landmarks = None
+        self._timestamps, self._landmarks = self._allocate(capacity)
+        self._timestamps[:self.frames] = old_timestamps
+        self._landmarks[:self.frames] = old_landmarks
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(dict(self.meta, frames=self.frames), f)
+
+    def append(self, pts, timestamp):
+        """Record one frame; pts is (33, 4) x, y, z, visibility"""
+        with self._lock:
+            if self._landmarks is None:
+                return  # Closed
+            if self.frames == self.capacity:
+                self._grow()
+            self._timestamps[self.frames] = timestamp
+            self._landmarks[self.frames] = pts
+            self.frames += 1
+            if self.frames % META_FLUSH_EVERY == 0:
+                self._write_meta()
+
+    def close(self):
+        with self._lock:
+            if self._landmarks is None:
+                return
+            self._timestamps.flush()
+            self._landmarks.flush()
+            self._timestamps = self._landmarks = None
+            self._write_meta()
+
+
+def load_recording(path):
+    """Return (timestamps, landmarks, meta) as read-only memmaps of the recorded frames"""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    frames = meta["frames"]
+    timestamps = np.load(os.path.join(path, "timestamps.npy"), mmap_mode="r")[:frames]
+    landmarks = np.load(os.path.join(path, "landmarks.npy"), mmap_mode="r")[:frames]
+    return timestamps, landmarks, meta
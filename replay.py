@@ -0,0 +1,97 @@
+# replay.py
+"""Re-score recorded landmark streams without a camera or MediaPipe.
+
+Usage:
+    python replay.py recordings/2026-01-01T10-00-00 --mode Squat \
+        --grid squat_knee_min=70,80,90 --grid squat_knee_max=150,160
+
+Recordings come from recorder.LandmarkRecorder. Joint angles for the whole
+recording are computed in one vectorized call, then every threshold
+combination in the grid is advanced through WorkoutAnalyzer.step() in a single
+pass over the frames. For float32 recordings (the recorder's default) the
+results match what /video_feed would have counted; float16 recordings can
+differ by a rep where an angle sits right at a threshold.
+"""
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+
+from angles import compute_angles
+from analyzer import DEFAULT_THRESHOLDS, MODES, WorkoutAnalyzer
+from filters import parse_smoothing
+from recorder import load_recording
+
+CHUNK_FRAMES = 65536  # Bounds the float32 working set for long recordings
+
+
+def threshold_grid(**ranges):
+    """Every combination of the given threshold values, as a list of dicts"""
+    names = sorted(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*(ranges[n] for n in names))]
+
+
+def replay(landmarks, timestamps, mode, grid=None, smoothing=None):
+    """Run each threshold set in grid over (T, 33, C) landmarks; returns one analyzer per set"""
+    analyzers = [WorkoutAnalyzer(thresholds, smoothing) for thresholds in (grid or [{}])]
+    steps = [a.step for a in analyzers]
+    for start in range(0, len(landmarks), CHUNK_FRAMES):
+        chunk = np.asarray(landmarks[start:start + CHUNK_FRAMES], dtype=np.float32)
+        angles = compute_angles(chunk).tolist()
+        xs = chunk[:, :, 0].tolist()
+        ys = chunk[:, :, 1].tolist()
+        times = np.asarray(timestamps[start:start + CHUNK_FRAMES], dtype=np.float64).tolist()
+        for frame_angles, frame_xs, frame_ys, now in zip(angles, xs, ys, times):
+            for step in steps:
+                step(frame_angles, frame_xs, frame_ys, mode, now)
+    return analyzers
+
+
+def replay_recording(path, mode=None, grid=None, smoothing=None):
+    """Re-score one recording; returns a JSON-serialisable result dict"""
+    timestamps, landmarks, meta = load_recording(path)
+    mode = mode or meta.get("mode", "Push-Up")
+    started = time.perf_counter()
+    analyzers = replay(landmarks, timestamps, mode, grid, smoothing)
+    elapsed = time.perf_counter() - started
+    return {
+        "recording": path,
+        "mode": mode,
+        "frames": len(landmarks),
+        "frames_per_second": len(landmarks) * len(analyzers) / elapsed if elapsed else None,
+        "results": [dict(a.counters(), thresholds=a.thresholds, total_reps=a.total_reps(mode))
+                    for a in analyzers],
+    }
+
+
+# ------------------ CLI ------------------
+def _parse_grid(items):
+    ranges = {}
+    for item in items or []:
+        name, _, values = item.partition("=")
+        if name not in DEFAULT_THRESHOLDS:
+            raise SystemExit(f"Unknown threshold {name!r}; choose from {', '.join(DEFAULT_THRESHOLDS)}")
+        ranges[name] = [float(v) for v in values.split(",") if v]
+    return threshold_grid(**ranges) if ranges else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded landmark sessions")
+    parser.add_argument("recordings", nargs="+", help="Recording directories")
+    parser.add_argument("--mode", choices=MODES, help="Exercise to score (default: recorded mode)")
+    parser.add_argument("--grid", action="append", metavar="NAME=V1,V2,...",
+                        help="Threshold values to sweep; repeat for a multi-dimensional grid")
+    parser.add_argument("--smoothing", metavar="SPEC",
+                        help='Angle filter, e.g. "one_euro" or "default=mean:8,r_knee=ema:0.4"')
+    args = parser.parse_args()
+
+    grid = _parse_grid(args.grid)
+    smoothing = parse_smoothing(args.smoothing)
+    for path in args.recordings:
+        print(json.dumps(replay_recording(path, args.mode, grid, smoothing)))
+
+
+if __name__ == '__main__':
+    main()
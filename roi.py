@@ -0,0 +1,94 @@
+# roi.py
+import cv2
+
+ROI_MARGIN = 0.25  # Padding around the landmark box, as a fraction of its size
+ROI_INPUT_SIZE = 320  # Longest side of the crop handed to inference
+ROI_MIN_VISIBILITY = 0.5  # Mean visibility below this counts as tracking lost
+
+
+class RoiTracker:
+    """Crops inference input to the region around the person seen in the previous frame.
+
+    The crop box only moves when the landmarks drift into its margin or the
+    person's size changes a lot, which keeps MediaPipe's own frame-to-frame
+    tracking stable. When no person is found (or visibility collapses) the
+    next frame runs a full-frame detection pass. Landmarks from a cropped pass
+    are mapped back to full-frame normalized coordinates in place.
+    """
+
+    def __init__(self, margin=ROI_MARGIN, input_size=ROI_INPUT_SIZE, min_visibility=ROI_MIN_VISIBILITY):
+        self.margin = margin
+        self.input_size = input_size
+        self.min_visibility = min_visibility
+        self.box = None  # (x0, y0, x1, y1) pixels in the full frame, None = full-frame pass
+        self.full_frame_passes = 0
+        self.cropped_passes = 0
+
+    def crop(self, img):
+        """Return (inference input, box used); box is None for a full-frame pass"""
+        box = self.box
+        if box is None:
+            self.full_frame_passes += 1
+            return img, None
+        x0, y0, x1, y1 = box
+        region = img[y0:y1, x0:x1]
+        scale = self.input_size / max(x1 - x0, y1 - y0)
+        if scale < 1.0:
+            region = cv2.resize(region, (max(1, int((x1 - x0) * scale)), max(1, int((y1 - y0) * scale))),
+                                interpolation=cv2.INTER_AREA)
+        self.cropped_passes += 1
+        return region, box
+
+    def update(self, results, box, frame_shape):
+        """Map landmarks from the crop to the full frame and choose the next box"""
+        h, w = frame_shape[:2]
+        if not results.pose_landmarks:
+            self.box = None
+            return
+        landmarks = results.pose_landmarks.landmark
+
+        if box is not None:
+            x0, y0, x1, y1 = box
+            bw, bh = x1 - x0, y1 - y0
+            for lm in landmarks:
+                lm.x = (x0 + lm.x * bw) / w
+                lm.y = (y0 + lm.y * bh) / h
+                lm.z = lm.z * bw / w
+
+        if sum(lm.visibility for lm in landmarks) / len(landmarks) < self.min_visibility:
+            self.box = None
+            return
+
+        xs = [lm.x * w for lm in landmarks]
+        ys = [lm.y * h for lm in landmarks]
+        lx0, lx1, ly0, ly1 = min(xs), max(xs), min(ys), max(ys)
+        if self.box is not None and self._still_fits(lx0, ly0, lx1, ly1):
+            return
+
+        pad_x = (lx1 - lx0) * self.margin
+        pad_y = (ly1 - ly0) * self.margin
+        nx0, ny0 = max(0, int(lx0 - pad_x)), max(0, int(ly0 - pad_y))
+        nx1, ny1 = min(w, int(lx1 + pad_x)), min(h, int(ly1 + pad_y))
+        if nx1 - nx0 < 16 or ny1 - ny0 < 16:
+            self.box = None
+        elif nx1 - nx0 >= w * 0.9 and ny1 - ny0 >= h * 0.9:
+            self.box = None  # Person fills the frame; cropping would save nothing
+        else:
+            self.box = (nx0, ny0, nx1, ny1)
+
+    def _still_fits(self, lx0, ly0, lx1, ly1):
+        """Landmarks stay inside the box's inner area and still fill a fair share of it"""
+        x0, y0, x1, y1 = self.box
+        inset_x = (x1 - x0) * self.margin / (1 + 2 * self.margin) / 2
+        inset_y = (y1 - y0) * self.margin / (1 + 2 * self.margin) / 2
+        inside = (lx0 >= x0 + inset_x and lx1 <= x1 - inset_x
+                  and ly0 >= y0 + inset_y and ly1 <= y1 - inset_y)
+        filled = (lx1 - lx0) * (ly1 - ly0) >= 0.3 * (x1 - x0) * (y1 - y0)
+        return inside and filled
+
+    def status(self):
+        return {
+            "box": list(self.box) if self.box else None,
+            "full_frame_passes": self.full_frame_passes,
+            "cropped_passes": self.cropped_passes,
+        }
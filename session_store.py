@@ -0,0 +1,291 @@
+# session_store.py
+"""Persistent workout session history in SQLite (WAL mode).
+
+Sessions are buffered in memory and written in batches, either by a
+background flusher every `flush_interval` seconds or before any read, so a
+burst of saves costs one transaction and readers always see every session.
+
+Per-mode running totals are loaded once at startup and then updated in O(1)
+on every add(), so unfiltered summaries never touch the database. `version`
+increments with each add() and can be used as a cache validator.
+
+A batch that fails to write (locked or full disk, ...) is put back at the
+front of the buffers and retried with the next flush, so nothing is lost.
+
+Writers (add, add_reps; called from frame loops) only take a short lock
+around the in-memory buffers, never the connection lock held for the
+duration of a query, so a slow history query can't stall a camera.
+
+Individual reps (exercises.RepEvent) go to an append-only `rep_events` table
+through the same batching, so per-rep questions such as the average descent
+tempo over a month are one indexed aggregate instead of a video reprocess.
+"""
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from analyzer import COUNTER_FIELDS
+
+logger = logging.getLogger(__name__)
+
+SESSION_COLUMNS = ("id", "mode", "start_time", "end_time", "total_reps") + COUNTER_FIELDS + ("recording", "station")
+TOTAL_FIELDS = ("total_reps",) + COUNTER_FIELDS
+# start_ts / bottom_ts / end_ts are Unix times; rep_time is end_ts as a local ISO string like session times
+REP_COLUMNS = ("station", "person", "session_start", "mode", "side", "rep_time", "start_ts", "bottom_ts",
+               "end_ts", "min_angle", "max_angle", "posture", "good")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    mode TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    total_reps INTEGER NOT NULL DEFAULT 0,
+    {counters},
+    recording TEXT,
+    station TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_mode ON sessions (mode);
+CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions (start_time);
+CREATE TABLE IF NOT EXISTS rep_events (
+    id INTEGER PRIMARY KEY,
+    station TEXT,
+    person INTEGER,
+    session_start TEXT,
+    mode TEXT NOT NULL,
+    side TEXT,
+    rep_time TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    bottom_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    min_angle REAL NOT NULL,
+    max_angle REAL NOT NULL,
+    posture REAL,
+    good INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rep_events_mode_time ON rep_events (mode, rep_time);
+CREATE INDEX IF NOT EXISTS idx_rep_events_rep_time ON rep_events (rep_time);
+""".format(counters=",\n    ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name in COUNTER_FIELDS))
+
+
+class SessionStore:
+    """SQLite-backed session history with batched writes and indexed queries"""
+
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()  # The connection: held for each query or batch write
+        self._pending_lock = threading.Lock()  # Buffers, ids and totals: held only briefly
+        self._pending = []
+        self._pending_reps = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._next_id = (self._conn.execute("SELECT MAX(id) FROM sessions").fetchone()[0] or 0) + 1
+        self.version = 0
+        self._totals = self._query_totals_by_mode("", [])
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="session-store-flush", daemon=True)
+        self._flusher.start()
+
+    def _migrate(self):
+        """Add columns introduced after a database was created"""
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        with self._conn:
+            if "station" not in existing:
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN station TEXT")
+
+    # ------------------ Writes ------------------
+    def peek_next_id(self):
+        return self._next_id
+
+    def add(self, session):
+        """Queue a session for the next batch write; assigns and returns its id"""
+        with self._pending_lock:
+            session["id"] = self._next_id
+            self._next_id += 1
+            self._pending.append(tuple(session.get(name) for name in SESSION_COLUMNS))
+            totals = self._totals.get(session.get("mode"))
+            if totals is None:
+                totals = self._totals[session.get("mode")] = dict.fromkeys(("sessions",) + TOTAL_FIELDS, 0)
+            totals["sessions"] += 1
+            for name in TOTAL_FIELDS:
+                totals[name] += session.get(name) or 0
+            self.version += 1
+        return session["id"]
+
+    def add_reps(self, events, station=None, person=None, session_start=None, clock_offset=0.0):
+        """Queue RepEvents for the next batch write.
+
+        clock_offset converts the events' frame timestamps to Unix time
+        (time.time() - time.monotonic() for live frames).
+        """
+        rows = []
+        for event in events:
+            end = event.end + clock_offset
+            rows.append((station, person, session_start, event.mode, event.side,
+                         datetime.fromtimestamp(end).isoformat(), event.start + clock_offset,
+                         event.bottom + clock_offset, end, event.min_angle, event.max_angle,
+                         event.posture, int(event.good)))
+        with self._pending_lock:
+            self._pending_reps.extend(rows)
+
+    def flush(self):
+        # Swap the buffers while holding the connection lock, so a reader that
+        # flushes first never queries while another flush still holds its rows
+        with self._lock:
+            with self._pending_lock:
+                if not (self._pending or self._pending_reps):
+                    return
+                rows, self._pending = self._pending, []
+                reps, self._pending_reps = self._pending_reps, []
+            try:
+                self._write_batch(rows, reps)
+            except sqlite3.Error:
+                with self._pending_lock:  # Keep the batch, ahead of anything added meanwhile
+                    self._pending[:0] = rows
+                    self._pending_reps[:0] = reps
+                raise
+
+    def _write_batch(self, rows, reps):
+        with self._conn:
+            if rows:
+                self._conn.executemany(
+                    f"INSERT INTO sessions ({', '.join(SESSION_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(SESSION_COLUMNS))})", rows)
+            if reps:
+                self._conn.executemany(
+                    f"INSERT INTO rep_events ({', '.join(REP_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(REP_COLUMNS))})", reps)
+
+    def _flush_loop(self):
+        failing = False
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                if not failing:  # Log once per failure streak, not every interval
+                    logger.exception("Session store flush failed; keeping the batch and retrying")
+                failing = True
+            else:
+                if failing:
+                    logger.warning("Session store flush recovered")
+                failing = False
+
+    def close(self):
+        self._stop.set()
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._conn.close()
+
+    # ------------------ Queries ------------------
+    @staticmethod
+    def _where(mode=None, since=None, until=None, time_column="start_time", station=None):
+        clauses = []
+        params = []
+        if mode:
+            clauses.append("mode = ?")
+            params.append(mode)
+        if since:
+            clauses.append(f"{time_column} >= ?")
+            params.append(since)
+        if until:
+            clauses.append(f"{time_column} < ?")
+            params.append(until)
+        if station:
+            clauses.append("station = ?")
+            params.append(station)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, mode=None, since=None, until=None):
+        if not (mode or since or until):
+            with self._pending_lock:
+                return sum(totals["sessions"] for totals in self._totals.values())
+        where, params = self._where(mode, since, until)
+        with self._lock:
+            self.flush()
+            return self._conn.execute(f"SELECT COUNT(*) FROM sessions{where}", params).fetchone()[0]
+
+    def list_sessions(self, mode=None, since=None, until=None, limit=100, offset=0, newest_first=True):
+        """One page of sessions matching the filters, as dicts"""
+        where, params = self._where(mode, since, until)
+        order = "DESC" if newest_first else "ASC"
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                f"SELECT * FROM sessions{where} ORDER BY start_time {order}, id {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]).fetchall()
+        sessions = []
+        for row in rows:
+            session = dict(row)
+            if session["recording"] is None:
+                del session["recording"]
+            sessions.append(session)
+        return sessions
+
+    def _query_totals_by_mode(self, where, params):
+        sums = ", ".join(f"COALESCE(SUM({name}), 0) AS {name}" for name in TOTAL_FIELDS)
+        rows = self._conn.execute(
+            f"SELECT mode, COUNT(*) AS sessions, {sums} FROM sessions{where} GROUP BY mode",
+            params).fetchall()
+        totals = {}
+        for row in rows:
+            totals[row["mode"]] = {name: row[name] for name in ("sessions",) + TOTAL_FIELDS}
+        return totals
+
+    def totals_by_mode(self, mode=None, since=None, until=None):
+        """{mode: {"sessions": n, "total_reps": ..., <summed counters>}}
+
+        Unfiltered calls are served from the running totals; filtered ones run
+        a single indexed GROUP BY.
+        """
+        if not (mode or since or until):
+            with self._pending_lock:
+                return {m: dict(totals) for m, totals in self._totals.items()}
+        where, params = self._where(mode, since, until)
+        with self._lock:
+            self.flush()
+            return self._query_totals_by_mode(where, params)
+
+    # ------------------ Rep Queries ------------------
+    def list_reps(self, mode=None, since=None, until=None, station=None, limit=100, offset=0):
+        """One page of rep events matching the filters (by rep_time), newest first, as dicts"""
+        where, params = self._where(mode, since, until, "rep_time", station)
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                f"SELECT * FROM rep_events{where} ORDER BY rep_time DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]).fetchall()
+        reps = []
+        for row in rows:
+            rep = dict(row)
+            rep["good"] = bool(rep["good"])
+            reps.append(rep)
+        return reps
+
+    def rep_stats(self, mode=None, since=None, until=None, station=None):
+        """Per-rep averages grouped by mode and side.
+
+        The bottom is the smallest joint angle, so for push-ups and squats
+        seconds_to_bottom is the descent and seconds_from_bottom the ascent;
+        for curls they are the lift and the lowering.
+        """
+        where, params = self._where(mode, since, until, "rep_time", station)
+        with self._lock:
+            self.flush()
+            rows = self._conn.execute(
+                "SELECT mode, side, COUNT(*) AS reps, SUM(good) AS good_reps, "
+                "AVG(end_ts - start_ts) AS rep_seconds, AVG(bottom_ts - start_ts) AS seconds_to_bottom, "
+                "AVG(end_ts - bottom_ts) AS seconds_from_bottom, AVG(max_angle - min_angle) AS range_of_motion, "
+                "AVG(min_angle) AS min_angle, AVG(posture) AS posture "
+                f"FROM rep_events{where} GROUP BY mode, side ORDER BY mode, side",
+                params).fetchall()
+        return [{key: round(value, 3) if isinstance(value, float) else value for key, value in dict(row).items()}
+                for row in rows]
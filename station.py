@@ -0,0 +1,522 @@
+# station.py
+import collections
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from analyzer import WorkoutAnalyzer
+from angles import LandmarkBuffer
+from encoder import (DEFAULT_QUALITY, MSG_THUMBNAIL, NO_POSE_MESSAGE, THUMBNAIL_INTERVAL, THUMBNAIL_WIDTH,
+                     JpegEncoder, make_profile, mjpeg_part, pack_landmarks, pack_message, thumbnail_profile)
+from governor import InferenceGovernor
+from metrics import timed
+from multiperson import DETECT_EVERY, MAX_PEOPLE, MultiPersonTracker, MultiPoseResults
+from pipeline import FrameBroadcaster, FramePipeline, SourceEnded, StateBroadcaster
+from recorder import LandmarkRecorder
+from roi import RoiTracker
+
+mp_pose = None  # MediaPipe solution modules, set by load_mediapipe()
+mp_draw = None
+
+COMMAND_WAIT = 0.25  # Seconds to let the frame loop apply a command before applying it from the caller
+WARMUP_FRAME_SHAPE = (480, 640, 3)  # Blank frame for the warm-up inference
+WARMUP_RETRY_MIN = 5.0  # Seconds before retrying a failed model load; doubles per failure
+WARMUP_RETRY_MAX = 300.0
+NO_RESULTS = MultiPoseResults(None, ())  # Frames passed through uninferred while the model can't load
+
+logger = logging.getLogger(__name__)
+
+
+class StationState(collections.namedtuple("StationState", "pose_data mode session_start session_mode counters total_reps")):
+    """Immutable snapshot of a station after one frame (or command); never mutate its dicts"""
+
+    __slots__ = ()
+
+
+def load_mediapipe():
+    """Import MediaPipe on first use; the import (with matplotlib) takes most of a second"""
+    global mp_pose, mp_draw
+    if mp_pose is None:
+        import mediapipe as mp
+        mp_draw = mp.solutions.drawing_utils
+        mp_pose = mp.solutions.pose
+    return mp_pose
+
+
+def draw_skeleton(img, landmarks):
+    load_mediapipe()
+    mp_draw.draw_landmarks(img, landmarks, mp_pose.POSE_CONNECTIONS)
+
+
+def make_pose(model_complexity):
+    return load_mediapipe().Pose(static_image_mode=False,
+                                 model_complexity=model_complexity,
+                                 enable_segmentation=False,
+                                 min_detection_confidence=0.5,
+                                 min_tracking_confidence=0.5)
+
+
+def make_detector():
+    """Static-image Pose used to find new people in multi-person mode"""
+    return load_mediapipe().Pose(static_image_mode=True,
+                                 model_complexity=0,
+                                 enable_segmentation=False,
+                                 min_detection_confidence=0.5)
+
+
+def parse_source(source):
+    """Camera index for digit strings ("0"), otherwise a file path or stream URL"""
+    source = source.strip()
+    return int(source) if source.isdigit() else source
+
+
+class VideoFileSource:
+    """Video file read like a camera: paced to its own frame rate, looping (or ending) at EOF.
+
+    Unpaced, a file would be decoded as fast as the CPU allows and starve the
+    other stations; at EOF cap.read() just keeps failing. With loop=False, or
+    if the file yields nothing even after rewinding, read() raises SourceEnded.
+    """
+
+    def __init__(self, path, loop=True, default_fps=30.0):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or default_fps  # 0 when the container doesn't say
+        self._next_read = time.monotonic()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        # Never more than a second behind, so a stall isn't followed by a burst
+        self._next_read = max(self._next_read + 1.0 / self.fps, time.monotonic() - 1.0)
+        delay = self._next_read - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        success, img = self.cap.read()
+        if not success and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, img = self.cap.read()
+        if not success:
+            raise SourceEnded(self.path)
+        return success, img
+
+    def release(self):
+        self.cap.release()
+
+
+class Station:
+    """One workout station: its capture source, Pose instance, counters and session.
+
+    Every station runs its own FramePipeline; when a shared InferenceScheduler
+    is given, inference for all stations is spread over its worker pool.
+    source is anything cv2.VideoCapture opens, or an already open capture-like
+    object with read() / release(). Video files are read as a VideoFileSource,
+    paced to their frame rate and looping unless loop_video is False, in which
+    case the station stops capturing at the end. With a metrics.Metrics registry, each
+    pipeline stage is timed into its histograms. rep_log, if given, is called
+    as rep_log(events, station, person, session_start, clock_offset) with the
+    RepEvents completed on each frame (SessionStore.add_reps fits).
+
+    With multi_person, a MultiPersonTracker replaces the single Pose graph and
+    every tracked person gets their own counters. `analyzer` then belongs to
+    one track, `session_person`, whose counters the legacy fields and saved
+    sessions use. It is bound to the longest-tracked person when a session
+    starts (or when nobody is bound yet). During a session it never moves to
+    anyone else: if that person leaves, their counters simply stop advancing.
+
+    Nothing slow happens at construction: the camera opens on the first
+    start() and the pose model loads in warm_up(), which the app runs in the
+    background at launch and the frame loop runs before its first frame
+    otherwise (and retries, with backoff, if loading failed).
+
+    The analyzer, mode and session fields belong to the frame loop. HTTP
+    threads read the latest StationState from `state` (swapped as a whole, so
+    reads are never torn and need no lock) and change things only through
+    run_command(), which the loop applies between frames.
+    """
+
+    def __init__(self, station_id, source=0, scheduler=None, target_fps=15.0, max_complexity=2,
+                 adaptive=True, roi_tracking=False, recordings_dir="recordings", smoothing=None,
+                 jpeg_quality=DEFAULT_QUALITY, jpeg_encoder="auto", metrics=None, multi_person=False,
+                 max_people=MAX_PEOPLE, detect_every=DETECT_EVERY, person_workers=None, rep_log=None, loop_video=True):
+        self.id = station_id
+        self.source = source
+        self.loop_video = loop_video
+        self.recordings_dir = recordings_dir
+
+        self.cap = source if hasattr(source, "read") else None  # Cameras open in start()
+        self.camera_error = None
+        self.model_state = "cold"  # -> loading -> ready / error, see warm_up()
+        self.model_error = None
+        self._warmup_retry_delay = WARMUP_RETRY_MIN
+        self._warmup_retry_at = 0.0  # Monotonic time after which a failed load may be retried
+
+        # Switches model complexity / inference stride to keep up with target_fps
+        self.governor = InferenceGovernor(make_pose, target_fps, max_complexity, adaptive)
+        # ROI mode: infer on a downscaled crop around the person instead of the full frame
+        self.roi_tracker = RoiTracker() if roi_tracking else None
+        # Group classes: one Pose graph and one set of counters per tracked person
+        self.person_tracker = MultiPersonTracker(
+            make_pose, make_detector, min(max_complexity, 1), max_people, detect_every, person_workers, target_fps,
+            smoothing=smoothing) if multi_person else None
+
+        self.analyzer = WorkoutAnalyzer(smoothing=smoothing)  # Rep counters, stages and smoothing state
+        self.session_person = None  # Multi-person: id of the track `analyzer` belongs to
+        self.landmark_buffer = LandmarkBuffer()  # Reused for every frame's landmarks
+        self.mode = "Push-Up"
+        self.current_session_start = None
+        self.current_session_mode = None
+        self.recorder = None  # LandmarkRecorder for the current session, if recording
+        self.rep_log = rep_log
+        self._clock_offset = time.time() - time.monotonic()  # Frame timestamps -> Unix time for rep events
+
+        self.encoder = JpegEncoder(jpeg_encoder)
+        self.default_profile = make_profile(jpeg_quality)
+        read_frame, encode_frame = self.read_frame, self.encode_frame
+        self.inference_seconds = None  # Observed in _process_frame, only for frames that ran the pose model
+        if metrics is not None:
+            read_frame = timed(metrics.stage_seconds.labels(station_id, "capture"), read_frame)
+            encode_frame = timed(metrics.stage_seconds.labels(station_id, "encode"), encode_frame)
+            self.inference_seconds = metrics.stage_seconds.labels(station_id, "inference")
+        self.pipeline = FramePipeline(read_frame, self.process_frame, encode_frame, scheduler=scheduler,
+                                      default_profile=self.default_profile)
+        self.pose_updates = StateBroadcaster()  # Changed pose_data keys, pushed to /pose_stream clients
+        self.landmark_updates = FrameBroadcaster()  # Packed landmarks per inferred frame, for /landmark_stream
+        self._last_encoded = {}  # profile -> monotonic time, for rate-limited profiles
+        self.closed = False
+
+        self._commands = collections.deque()  # (future, func, args) waiting for the frame loop
+        self._frame_lock = threading.Lock()  # Held by the loop per frame; contended only by command fallbacks
+        self._model_lock = threading.Lock()  # Held while the pose model loads
+        self._start_lock = threading.Lock()
+        self.state = None
+        self.publish_state()
+
+    # ------------------ Frame Processing ------------------
+    def read_frame(self):
+        return self.cap.read()
+
+    def process_frame(self, img, timestamp=None):
+        """Run pose inference and the exercise state machines on one BGR frame.
+
+        timestamp is the frame's monotonic capture time; all exercise timing
+        is derived from it. Queued commands are applied first.
+        """
+        with self._frame_lock:
+            self._apply_commands()
+            return self._process_frame(img, timestamp)
+
+    def _process_frame(self, img, timestamp):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.model_state != "ready":
+            self.warm_up()  # Waits for a background warm-up still in progress
+            if self.model_state != "ready":
+                return NO_RESULTS  # Model failed to load; warm_up() retries it with backoff
+        if self.inference_seconds is None:
+            return self._infer_frame(img, timestamp)
+        inferences, started = self._inferences(), time.perf_counter()
+        results = self._infer_frame(img, timestamp)
+        if self._inferences() != inferences:  # Frames skipped by the stride would read as ~0 s inferences
+            self.inference_seconds.observe(time.perf_counter() - started)
+        return results
+
+    def _inferences(self):
+        if self.person_tracker is not None:
+            return self.person_tracker.person_inferences
+        return self.governor.frames_inferred
+
+    def _infer_frame(self, img, timestamp):
+        if self.person_tracker is not None:
+            return self._process_people(img, timestamp)
+        governor = self.governor
+        if not governor.should_infer():
+            return governor.last_results  # Hold the last landmarks between inferred frames
+
+        if self.roi_tracker is not None:
+            region, box = self.roi_tracker.crop(img)
+            results = governor.process(cv2.cvtColor(region, cv2.COLOR_BGR2RGB))
+            self.roi_tracker.update(results, box, img.shape)
+        else:
+            imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+            results = governor.process(imgRGB)
+
+        streaming = self.landmark_updates.subscriber_count()
+        if results.pose_landmarks:
+            active_recorder = self.recorder
+            pts = self.landmark_buffer.fill(results.pose_landmarks)  # Overwritten next frame; consumers copy
+            if active_recorder is not None:
+                active_recorder.append(pts, timestamp)
+            if streaming:
+                self.landmark_updates.publish(pack_landmarks(pts))
+            self.analyzer.update(pts, self.mode, timestamp)
+            if self.analyzer.rep_events:
+                self._log_reps(self.analyzer)
+            self.publish_state()
+        elif streaming:
+            self.landmark_updates.publish(NO_POSE_MESSAGE)
+
+        return results
+
+    def _process_people(self, img, timestamp):
+        """Multi-person frame: every track's counters advance inside the tracker"""
+        results = self.person_tracker.process(img, timestamp, self.mode, self.landmark_buffer)
+        tracks = self.person_tracker.tracks
+        if self.session_person not in tracks and (self.session_person is None or not self.current_session_start):
+            primary = self.person_tracker.primary()
+            if primary is not None:
+                self.session_person = primary.id
+                self.analyzer = primary.analyzer
+        for track in tracks.values():
+            if track.analyzer.rep_events:
+                self._log_reps(track.analyzer, track.id)
+        track = tracks.get(self.session_person)
+        # Record and stream the session's person, whoever is currently longest-tracked
+        results = results._replace(pose_landmarks=track.landmarks if track is not None else None)
+        streaming = self.landmark_updates.subscriber_count()
+        if results.pose_landmarks:
+            active_recorder = self.recorder
+            if active_recorder is not None or streaming:
+                pts = self.landmark_buffer.fill(results.pose_landmarks)
+                if active_recorder is not None:
+                    active_recorder.append(pts, timestamp)
+                if streaming:
+                    self.landmark_updates.publish(pack_landmarks(pts))
+        elif streaming:
+            self.landmark_updates.publish(NO_POSE_MESSAGE)
+        self.publish_state()
+        return results
+
+    def _log_reps(self, analyzer, person=None):
+        """Hand the analyzer's completed reps to rep_log and clear them"""
+        if self.rep_log is not None:
+            self.rep_log(analyzer.rep_events, self.id, person, self.current_session_start, self._clock_offset)
+        analyzer.rep_events.clear()
+
+    def encode_frame(self, img, results, profiles):
+        """Encode each requested profile; the skeleton is drawn once, after the raw thumbnails"""
+        now = time.monotonic()
+        frames = [None] * len(profiles)
+        due = []
+        if len(self._last_encoded) > len(profiles):  # Forget profiles nobody watches any more
+            self._last_encoded = {p: t for p, t in self._last_encoded.items() if p in profiles}
+        for i, profile in enumerate(profiles):
+            if profile.interval:
+                if now - self._last_encoded.get(profile, 0.0) < profile.interval:
+                    continue
+                self._last_encoded[profile] = now
+            due.append(i)
+        for i in due:
+            if profiles[i].kind == "thumbnail":
+                frames[i] = pack_message(MSG_THUMBNAIL, self.encoder.encode(img, profiles[i]))
+        annotated = [i for i in due if profiles[i].kind == "mjpeg"]
+        if annotated and self.person_tracker is not None:
+            for track_id, (x0, y0, x1, y1), landmarks in results.people:
+                draw_skeleton(img, landmarks)
+                cv2.rectangle(img, (x0, y0), (x1, y1), (255, 180, 0), 1)
+                cv2.putText(img, f"#{track_id}", (x0 + 4, y0 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 180, 0), 2)
+        elif annotated and results.pose_landmarks:
+            draw_skeleton(img, results.pose_landmarks)
+        for i in annotated:
+            frames[i] = mjpeg_part(self.encoder.encode(img, profiles[i]))
+        return frames
+
+    def profile(self, quality=None, width=None):
+        """Encode profile for a client's requested quality/width (station defaults otherwise)"""
+        return make_profile(quality, width, self.default_profile.quality)
+
+    def thumbnail_profile(self, interval=None, width=None):
+        """Low-rate raw-frame profile for landmark stream clients"""
+        return thumbnail_profile(interval or THUMBNAIL_INTERVAL, width or THUMBNAIL_WIDTH)
+
+    def build_pose_data(self, counters, analyzer=None):
+        """Counters, stages and angles shared by /pose_data and /pose_stream"""
+        analyzer = analyzer or self.analyzer
+        mode = self.mode
+        # Determine which angle to send based on mode
+        if mode == "Push-Up":
+            angle = analyzer.current_elbow_angle
+        elif mode == "Curl":
+            # For curl, use average of both arms
+            angle = int((analyzer.current_elbow_angle_r + analyzer.current_elbow_angle_l) / 2)
+        elif mode == "Squat":
+            angle = analyzer.current_knee_angle
+        elif mode == "Plank":
+            angle = analyzer.current_elbow_angle  # Using alignment deviation
+        else:
+            angle = analyzer.current_elbow_angle
+
+        data = dict(counters)
+        data.update({
+            "pushup_stage": analyzer.pushup_stage,
+            "curl_stage_r": analyzer.curl_stage_r,
+            "curl_stage_l": analyzer.curl_stage_l,
+            "squat_stage": analyzer.squat_stage,
+            "mode": mode,
+            "elbow_angle": angle,  # Generic angle display
+            "knee_angle": analyzer.current_knee_angle,
+            "elbow_angle_r": analyzer.current_elbow_angle_r,
+            "elbow_angle_l": analyzer.current_elbow_angle_l,
+            "rep_seconds": analyzer.rep_seconds,  # Tempo of the last completed rep
+        })
+        return data
+
+    def publish_state(self):
+        """Swap in a fresh StationState and push the changed keys to /pose_stream (frame loop only)"""
+        counters = self.analyzer.counters()
+        pose_data = self.build_pose_data(counters)
+        if self.person_tracker is not None:
+            pose_data["people"] = [dict(self.build_pose_data(track.analyzer.counters(), track.analyzer),
+                                        id=track_id, box=list(box))
+                                   for track_id, box, track in self.person_tracker.people()]
+            pose_data["session_person"] = self.session_person
+        self.state = StationState(pose_data, self.mode, self.current_session_start, self.current_session_mode,
+                                  counters, self.analyzer.total_reps(self.current_session_mode))
+        self.pose_updates.publish_state(pose_data)
+
+    def reset_counters(self):
+        """Fresh session counters for everyone at the station"""
+        self.analyzer.reset_counters()
+        if self.person_tracker is not None:
+            self.person_tracker.reset_counters()
+            self.session_person = None  # The next frame binds the new session to the longest-tracked person
+
+    # ------------------ Commands ------------------
+    def run_command(self, func, *args):
+        """Run func(*args) on the frame loop between two frames and return its result.
+
+        If no frame picks the command up within COMMAND_WAIT (pipeline stopped,
+        camera stalled), the caller applies the queue itself under the frame
+        lock, which still keeps it out of the middle of a frame.
+        """
+        future = concurrent.futures.Future()
+        self._commands.append((future, func, args))
+        if self.pipeline.running:
+            try:
+                return future.result(COMMAND_WAIT)
+            except concurrent.futures.TimeoutError:
+                pass
+        with self._frame_lock:
+            self._apply_commands()
+        return future.result()
+
+    def _apply_commands(self):
+        """Apply queued commands, then publish the resulting state; caller holds _frame_lock"""
+        if not self._commands:
+            return
+        while self._commands:
+            future, func, args = self._commands.popleft()
+            try:
+                future.set_result(func(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+        self.publish_state()
+
+    # ------------------ Recording ------------------
+    def start_recording(self, session_start):
+        """Begin recording landmarks for the session that started at session_start"""
+        self.stop_recording()
+        path = os.path.join(self.recordings_dir, f"{self.id}-{session_start.replace(':', '-')}")
+        self.recorder = LandmarkRecorder(path, mode=self.mode, start_time=session_start, station=self.id)
+
+    def stop_recording(self):
+        """Finish the active recording and return its path, if any"""
+        active_recorder, self.recorder = self.recorder, None
+        if active_recorder is None:
+            return None
+        active_recorder.close()
+        return active_recorder.path
+
+    def status(self):
+        """Station summary for the /stations listing"""
+        state = self.state
+        return {
+            "id": self.id,
+            "source": self.source if isinstance(self.source, (int, str)) else type(self.source).__name__,
+            "mode": state.mode,
+            "session_start": state.session_start,
+            "running": self.pipeline.running,
+        }
+
+    def readiness(self):
+        """Model and camera state for the /ready endpoint"""
+        return {
+            "id": self.id,
+            "model": self.model_state,
+            "model_error": self.model_error,
+            "camera": "ended" if self.pipeline.source_ended else "open" if self.cap is not None else "closed",
+            "camera_error": self.camera_error,
+        }
+
+    def warm_up(self):
+        """Load the pose model(s) and run one inference on a blank frame.
+
+        Returns at once when the model is ready; concurrent callers wait for
+        a load in progress. After a failure (kept in model_error) calls are
+        no-ops until a backoff of WARMUP_RETRY_MIN doubling to WARMUP_RETRY_MAX
+        seconds has passed, then the load is retried; frames arriving
+        meanwhile are passed through without inference.
+        """
+        if self.model_state == "error" and time.monotonic() < self._warmup_retry_at:
+            return
+        with self._model_lock:
+            if self.model_state == "ready" or self.closed:
+                return
+            if self.model_state == "error" and time.monotonic() < self._warmup_retry_at:
+                return  # Another caller failed while this one waited
+            self.model_state = "loading"
+            blank = np.zeros(WARMUP_FRAME_SHAPE, np.uint8)
+            try:
+                if self.person_tracker is not None:
+                    self.person_tracker.warm_up(blank)
+                else:
+                    self.governor.warm_up(blank)
+            except Exception as exc:
+                self.model_state = "error"
+                self.model_error = str(exc)
+                self._warmup_retry_at = time.monotonic() + self._warmup_retry_delay
+                logger.warning("Station %s: pose model load failed, retrying in %g s: %s",
+                               self.id, self._warmup_retry_delay, exc)
+                self._warmup_retry_delay = min(self._warmup_retry_delay * 2, WARMUP_RETRY_MAX)
+                return
+            self.model_state = "ready"
+            self.model_error = None
+            self._warmup_retry_delay = WARMUP_RETRY_MIN
+
+    def start(self):
+        """Open the camera and start capture and inference; a no-op once running or after close().
+
+        Raises RuntimeError if the camera cannot be opened.
+        """
+        with self._start_lock:
+            if self.closed:
+                return
+            if self.cap is None:
+                if isinstance(self.source, str) and os.path.isfile(self.source):
+                    cap = VideoFileSource(self.source, self.loop_video)
+                else:
+                    cap = cv2.VideoCapture(self.source)
+                if not cap.isOpened():
+                    cap.release()
+                    self.camera_error = f"Cannot open camera {self.source!r} for station {self.id}"
+                    raise RuntimeError(self.camera_error)
+                self.cap, self.camera_error = cap, None
+            self.pipeline.start()
+
+    def close(self):
+        """Stop the pipeline, finish any recording and release the camera"""
+        with self._start_lock:
+            self.closed = True
+        self.pipeline.stop()
+        self.stop_recording()
+        if self.person_tracker is not None:
+            self.person_tracker.close()
+        if self.cap is not None:
+            self.cap.release()
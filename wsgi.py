@@ -0,0 +1,14 @@
+# wsgi.py
+"""WSGI entry point for external servers, e.g.
+
+    gunicorn -w 1 -k gthread --threads 32 -b 127.0.0.1:5000 wsgi:app
+
+Use a single worker process: each worker opens every camera and loads the
+pose models, and a camera can only be opened once. Scale with threads.
+Model warm-up starts in the background at import and cameras open on their
+first stream; gunicorn's graceful worker exit runs the registered shutdown,
+which saves active sessions and releases the cameras.
+"""
+from app import app, start_engine
+
+start_engine()